@@ -0,0 +1,117 @@
+"""
+Abilities - one normalizer for ability levels across importers and groupers.
+
+Booking exports carry the ability inside the product description, in two
+shapes:
+
+    cxv  - an ability code at the end: "Ride Tribe Late - Cardrona Ski - BZ2"
+    wps  - a level phrase in the middle: "Wanaka Primary - First Time Ski - Cardrona"
+
+Hand-entered spreadsheets use labels ("Beginner 1", "Intermediate", "adv").
+``normalize_ability`` maps any of these onto a canonical code (see
+ABILITY_CODES) or None when nothing is recognized; callers keep their own
+fallback for unknown values. A season has a few dozen distinct products, so
+results are memoized per distinct text and ``normalize_series`` converts each
+distinct value of a column once.
+"""
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+# Canonical codes, easiest first. BZ / IZ are used when the level has no number.
+ABILITY_CODES = ('FT', 'BZ', 'BZ1', 'BZ2', 'NZ', 'IZ', 'IZ1', 'IZ2', 'AZ')
+
+ABILITY_LABELS = {
+    'FT': 'First Time',
+    'BZ': 'Beginner',
+    'BZ1': 'Beginner 1',
+    'BZ2': 'Beginner 2',
+    'NZ': 'Novice',
+    'IZ': 'Intermediate',
+    'IZ1': 'Blue Intermediate',
+    'IZ2': 'Red Intermediate',
+    'AZ': 'Advanced',
+}
+
+# Whole-value aliases (upper case, single-spaced)
+_ALIASES = {
+    alias: code
+    for code, aliases in {
+        'FT': ('FT', 'FIRST TIMER', 'FIRST-TIMER', 'FIRST TIME', 'BEGINNER0', 'B0'),
+        'BZ': ('BZ', 'BEGINNER', 'BEGINNER ZONE'),
+        'BZ1': ('BZ1', 'BEGINNER1', 'B1', 'BEGINNER 1', 'BEGINNER ZONE 1'),
+        'BZ2': ('BZ2', 'BEGINNER2', 'B2', 'BEGINNER 2', 'BEGINNER ZONE 2'),
+        'NZ': ('NZ', 'NOVICE', 'NOVICE ZONE'),
+        'IZ': ('IZ', 'INTERMEDIATE', 'INTERMEDIATE ZONE', 'INT', 'I'),
+        'IZ1': ('IZ1', 'INTERMEDIATE 1', 'INTERMEDIATE ZONE 1', 'BLUE INTERMEDIATE'),
+        'IZ2': ('IZ2', 'INTERMEDIATE 2', 'INTERMEDIATE ZONE 2', 'RED INTERMEDIATE'),
+        'AZ': ('AZ', 'ADVANCED', 'ADVANCED ZONE', 'ADV', 'A'),
+    }.items()
+    for alias in aliases
+}
+
+# CXV products end with a code: "... - FT"
+_CODE_SUFFIX = re.compile(r'\s-\s*([A-Z]{1,3}\d?)$')
+
+# WPS products name the level somewhere in the text; first match wins
+_LEVEL_PHRASES = (
+    (re.compile(r'\bFIRST[\s-]*TIME'), 'FT'),
+    (re.compile(r'\bBEGINNER(?:\s+ZONE)?\s*([12])\b'), 'BZ'),
+    (re.compile(r'\bBEGINNER'), 'BZ'),
+    (re.compile(r'\bNOVICE'), 'NZ'),
+    (re.compile(r'\bBLUE\s+INTERMEDIATE'), 'IZ1'),
+    (re.compile(r'\bRED\s+INTERMEDIATE'), 'IZ2'),
+    (re.compile(r'\bINTERMEDIATE(?:\s+ZONE)?\s*([12])\b'), 'IZ'),
+    (re.compile(r'\bINTERMEDIATE'), 'IZ'),
+    (re.compile(r'\bADVANCED'), 'AZ'),
+)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_text(text):
+    if text in _ALIASES:
+        return _ALIASES[text]
+    suffix = _CODE_SUFFIX.search(text)
+    if suffix and suffix.group(1) in _ALIASES:
+        return _ALIASES[suffix.group(1)]
+    for pattern, code in _LEVEL_PHRASES:
+        match = pattern.search(text)
+        if match:
+            # Numbered zones ("Intermediate Zone 2") keep their number
+            return code + match.group(1) if pattern.groups else code
+    return None
+
+
+def normalize_ability(value):
+    """Return the canonical ability code for a label or product description, or None.
+
+    >>> normalize_ability('Ride Tribe Late - Cardrona Ski - BZ2')
+    'BZ2'
+    >>> normalize_ability('Wanaka Primary - First Time Ski - Cardrona')
+    'FT'
+    """
+    if not isinstance(value, str):
+        return None
+    text = ' '.join(value.upper().split())
+    return _normalize_text(text) if text else None
+
+
+def ability_label(code, default='Unknown'):
+    """Human-readable label for a canonical code (e.g. 'IZ1' -> 'Blue Intermediate')."""
+    return ABILITY_LABELS.get(code, default)
+
+
+def normalize_series(values, default=None):
+    """Vectorized ``normalize_ability``: each distinct value is normalized once.
+
+    Unrecognized and missing values become ``default``; pass the input
+    series itself to keep the original text where nothing was recognized.
+    """
+    codes, uniques = pd.factorize(values)
+    # Missing values get code -1, which picks the trailing None
+    mapped = [normalize_ability(v) for v in uniques] + [None]
+    result = pd.Series(pd.Series(mapped, dtype=object).to_numpy()[codes], index=values.index, dtype=object)
+    if isinstance(default, pd.Series):
+        return result.where(result.notna(), default)
+    return result.fillna(default) if default is not None else result
@@ -1,10 +1,11 @@
-import pandas as pd
 import sys
 
+from report_reader import read_report
+
 def load_excel_data(file_path):
     try:
-        # Read the Excel file
-        df = pd.read_excel(file_path)
+        # Read the report (header row detected automatically)
+        df = read_report(file_path).frame
         print("\n=== Excel File Loaded Successfully ===")
         print(f"Total Rows: {len(df)}")
         print("\n=== First 5 Rows ===")
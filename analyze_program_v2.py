@@ -1,6 +1,8 @@
 import pandas as pd
 import sys
 
+from report_reader import read_report
+
 def clean_column_names(columns):
     """Clean up column names by removing 'Unnamed' and extra spaces."""
     new_columns = []
@@ -13,22 +15,10 @@ def clean_column_names(columns):
 
 def load_excel_data(file_path):
     try:
-        # Read the Excel file, skipping initial rows that don't contain data
-        df = pd.read_excel(file_path, header=None)
-        
-        # Find the first row that contains actual column headers
-        header_row = None
-        for i, row in df.iterrows():
-            if any('Product Date' in str(cell) for cell in row if pd.notna(cell)):
-                header_row = i
-                break
-        
-        if header_row is None:
-            print("Could not find header row. Using first row as header.")
-            header_row = 0
-        
-        # Read the file again with the correct header row
-        df = pd.read_excel(file_path, header=header_row)
+        # Read the report once; the header row and flavour are detected from known columns
+        report = read_report(file_path)
+        df = report.frame
+        print(f"Detected '{report.flavour}' report with header on row {report.header_row}")
         
         # Clean up column names
         df.columns = clean_column_names(df.columns)
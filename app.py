@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, Response
 from flask_cors import CORS
 from flask_login import LoginManager, UserMixin, current_user, login_user, logout_user, login_required
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -13,6 +13,8 @@ import json
 from dataclasses import dataclass, field, asdict
 from typing import Dict, List, Optional, Any
 
+from abilities import ABILITY_CODES, ABILITY_LABELS, ability_label, normalize_ability
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 app.secret_key = 'your-secret-key-here'  # Change this to a secure secret key
@@ -116,7 +118,9 @@ class Group:
     program_id: str  # Reference to the parent program
     instructor: str = ""
     notes: str = ""
-    student_ids: List[str] = field(default_factory=list)
+    # Ordered set of member customer IDs (dict keys: O(1) membership, insertion order kept).
+    # Change membership through Program so its student -> group index stays in step.
+    student_ids: Dict[str, None] = field(default_factory=dict)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert group object to dictionary for JSON serialization."""
@@ -126,7 +130,7 @@ class Group:
             'program_id': self.program_id,
             'instructor': self.instructor,
             'notes': self.notes,
-            'student_ids': self.student_ids,
+            'student_ids': list(self.student_ids),
             'student_count': len(self.student_ids)
         }
 
@@ -140,6 +144,39 @@ class Program:
     active: bool = True
     students: Dict[str, Student] = field(default_factory=dict)
     groups: Dict[str, Group] = field(default_factory=dict)
+    # student_id -> group_id for every grouped student; maintained by assign/unassign/clear_groups
+    student_groups: Dict[str, str] = field(default_factory=dict, repr=False)
+    
+    def group_of(self, student_id: str) -> Optional[str]:
+        """ID of the group the student is in, or None."""
+        return self.student_groups.get(student_id)
+    
+    def assign(self, student_id: str, group_id: str) -> bool:
+        """Put a student in a group, moving them out of any other group.
+        
+        Returns:
+            bool: False if the student was already in that group
+        """
+        current = self.student_groups.get(student_id)
+        if current == group_id:
+            return False
+        if current is not None:
+            self.groups[current].student_ids.pop(student_id, None)
+        self.groups[group_id].student_ids[student_id] = None
+        self.student_groups[student_id] = group_id
+        return True
+    
+    def unassign(self, student_id: str) -> Optional[str]:
+        """Take a student out of their group; returns the group ID they left, if any."""
+        group_id = self.student_groups.pop(student_id, None)
+        if group_id is not None:
+            self.groups[group_id].student_ids.pop(student_id, None)
+        return group_id
+    
+    def clear_groups(self) -> None:
+        """Remove every group (and so every student's group)."""
+        self.groups = {}
+        self.student_groups = {}
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert program object to dictionary for JSON serialization."""
@@ -198,25 +235,8 @@ class SnowsportsManager:
         return "Unknown Program"
 
     def process_ability_level(self, product_desc):
-        """Map product description to ability level."""
-        if not isinstance(product_desc, str):
-            return "Unknown"
-            
-        # Extract the level code (e.g., 'FT' from 'Ride Tribe - FT')
-        level_match = product_desc.strip().split('-')[-1].strip()
-        
-        # Map to ability levels
-        ability_map = {
-            'FT': 'First Time',
-            'BZ1': 'Beginner 1',
-            'BZ2': 'Beginner 2',
-            'NZ': 'Novice',
-            'IZ1': 'Blue Intermediate',
-            'IZ2': 'Red Intermediate',
-            'AZ': 'Advanced'
-        }
-        
-        return ability_map.get(level_match, 'Unknown')
+        """Map product description to ability level (e.g. '... - IZ1' -> 'Blue Intermediate')."""
+        return ability_label(normalize_ability(product_desc))
 
     def get_program(self, program_id: str) -> Optional[Program]:
         """Get a program by ID."""
@@ -357,22 +377,13 @@ class SnowsportsManager:
         
         try:
             # Define ability order for sorting
-            ability_order = {
-                'First Time': 1,
-                'Beginner 1': 2,
-                'Beginner 2': 3,
-                'Novice': 4,
-                'Blue Intermediate': 5,
-                'Red Intermediate': 6,
-                'Advanced': 7,
-                'Unknown': 8
-            }
+            ability_order = {ABILITY_LABELS[code]: i for i, code in enumerate(ABILITY_CODES, 1)}
+            ability_order['Unknown'] = len(ability_order) + 1
             
             # Get list of students not already in a group
             unassigned_students = [
                 student for student in program.students.values()
-                if not any(student.customer_id in group.student_ids 
-                         for group in program.groups.values())
+                if program.group_of(student.customer_id) is None
             ]
             
             if not unassigned_students and not keep_existing:
@@ -380,7 +391,7 @@ class SnowsportsManager:
             
             # Clear existing groups if not keeping them
             if not keep_existing:
-                program.groups = {}
+                program.clear_groups()
             
             # Group students by ability level and age
             students_by_ability = {}
@@ -428,19 +439,19 @@ class SnowsportsManager:
         if program_id not in self.programs:
             return False
             
+        program = self.programs[program_id]
+        
         # Create the group if it doesn't exist
-        if group_id not in self.programs[program_id].groups:
-            self.programs[program_id].groups[group_id] = Group(
+        if group_id not in program.groups:
+            program.groups[group_id] = Group(
                 group_id=group_id,
                 name=group_id,
                 program_id=program_id
             )
             
-        # Add students to the group
-        group = self.programs[program_id].groups[group_id]
+        # Add students to the group (a student is in one group at a time)
         for student in students:
-            if student.customer_id not in group.student_ids:
-                group.student_ids.append(student.customer_id)
+            program.assign(student.customer_id, group_id)
                 
         return True
         
@@ -457,12 +468,7 @@ class SnowsportsManager:
         if program_id not in self.programs:
             return "Ungrouped"
             
-        program = self.programs[program_id]
-        for group_id, group in program.groups.items():
-            if student_id in group.student_ids:
-                return group_id
-                
-        return "Ungrouped"
+        return self.programs[program_id].group_of(student_id) or "Ungrouped"
         
     def add_note(self, program_id: str, student_id: str, note: str, author: str = "System") -> bool:
         """Add a note to a student's record.
@@ -612,17 +618,16 @@ def manage_group_student(group_id, student_id):
         return jsonify({'success': False, 'message': 'Student not found'}), 404
         
     if request.method == 'POST':
-        # Add student to group
-        if student_id in program.groups[group_id].student_ids:
+        # Add student to group (moving them out of their current one)
+        if not program.assign(student_id, group_id):
             return jsonify({'success': False, 'message': 'Student already in group'}), 400
             
-        program.groups[group_id].student_ids.append(student_id)
         return jsonify({'success': True, 'message': 'Student added to group'})
         
     elif request.method == 'DELETE':
         # Remove student from group
-        if student_id in program.groups[group_id].student_ids:
-            program.groups[group_id].student_ids.remove(student_id)
+        if program.group_of(student_id) == group_id:
+            program.unassign(student_id)
         return jsonify({'success': True, 'message': 'Student removed from group'})
 
 @app.route('/upload/<program_id>', methods=['POST'])
@@ -804,13 +809,20 @@ def export_checklist():
     # Get all students with their groups
     students = []
     for student in program.students.values():
-        group = next((g for g in program.groups.values() if student.id in g.members), None)
+        group_id = program.group_of(student.customer_id)
+        group = program.groups[group_id] if group_id else None
+        # Names are stored whole; 'Last, First' or 'First Last'
+        name = str(student.name or '')
+        if ',' in name:
+            last_name, first_name = (part.strip() for part in name.split(',', 1))
+        else:
+            first_name, _, last_name = name.strip().rpartition(' ')
         students.append({
-            'last_name': student.last_name,
-            'first_name': student.first_name,
-            'group_id': group.id if group else None,
+            'last_name': last_name,
+            'first_name': first_name,
+            'group_id': group_id,
             'group_name': group.name if group else 'Ungrouped',
-            'group_color': group_colors.get(group.id, '#CCCCCC') if group else '#CCCCCC'
+            'group_color': group_colors.get(group_id, '#CCCCCC') if group else '#CCCCCC'
         })
     
     # Sort students by last name, then first name
@@ -84,6 +84,45 @@ def register_cli(app):
             if admin:
                 click.echo("This user has admin privileges.")
 
+    @app.cli.command('regenerate-groups')
+    @click.argument('program_ids', nargs=-1)
+    @click.option('--workers', type=int, default=None, help='Worker processes (default: REGENERATION_WORKERS or CPU count)')
+    @click.option('--max-size', type=int, default=8, help='Maximum students per group')
+    @click.option('--algorithm', default=None, help='Grouping algorithm (snake, chunk, optimize)')
+    def regenerate_groups_cmd(program_ids, workers, max_size, algorithm):
+        """Regenerate all weeks of groups for PROGRAM_IDS (default: every active program) in parallel."""
+        from .regeneration import regenerate_programs
+        with app.app_context():
+            results = regenerate_programs(
+                app,
+                list(program_ids) or None,
+                workers=workers,
+                max_group_size=max_size,
+                algorithm=algorithm or app.config.get('GROUPING_ALGORITHM', 'snake'),
+                time_budget=app.config.get('GROUPING_TIME_BUDGET'),
+            )
+            if not results:
+                click.echo("No programs to regenerate.")
+            for r in results:
+                label = r.get('name') or r['program_id']
+                if r['success']:
+                    unplaced = f", {r['unplaced']} unplaced" if r['unplaced'] else ''
+                    click.echo(f"OK    {label}: {r['groups']} groups, {r['students']} students{unplaced}, "
+                               f"{r['weeks']} weeks ({r['seconds']}s)")
+                else:
+                    click.echo(f"FAIL  {label}: {r['error']}")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_cmd():
+        """Create the student search index if missing and re-index every student (e.g. after VACUUM)."""
+        from .student_search import create_search_index, search_backend
+        with app.app_context():
+            with db.engine.begin() as connection:
+                if create_search_index(connection):
+                    click.echo(f"Search index rebuilt ({search_backend(connection)}).")
+                else:
+                    click.echo("No search index for this database; search uses LIKE.")
+
 def create_app(config_name=None):
     """Create and configure the Flask application."""
     # Templates live in app/templates; static assets in project-root 'static/'
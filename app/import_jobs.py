@@ -0,0 +1,83 @@
+"""
+Import jobs - runs student file imports on an in-process worker pool.
+
+Uploads enqueue an ImportJob and return immediately; a small thread pool in
+each web process runs SnowsportsManager.process_file. Job rows live in the
+database, so any worker can answer status queries for any job.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+from flask import current_app
+
+from .models import db, ImportJob
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app):
+    """Create the worker pool lazily so each (forked) web process gets its own."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('IMPORT_WORKERS', 2),
+                thread_name_prefix='import-worker',
+            )
+        return _executor
+
+
+def enqueue_import(manager, filepath, filename, program_id, duplicate_strategy='skip', withdraw_missing=False):
+    """Record an ImportJob for an uploaded file and schedule it.
+
+    The worker deletes ``filepath`` once the import finishes. With
+    IMPORT_ASYNC disabled (e.g. in tests) the import runs before returning.
+
+    Returns:
+        str: ID of the new ImportJob
+    """
+    job = ImportJob(
+        id=str(uuid4()),
+        program_id=program_id,
+        filename=filename,
+        duplicate_strategy=duplicate_strategy,
+        withdraw_missing=withdraw_missing,
+        status='pending',
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    if app.config.get('IMPORT_ASYNC', True):
+        _get_executor(app).submit(_run_import, app, manager, job.id, filepath)
+    else:
+        _run_import(app, manager, job.id, filepath)
+    return job.id
+
+
+def _run_import(app, manager, job_id, filepath):
+    """Worker entry point: run one import inside its own app context and session."""
+    with app.app_context():
+        try:
+            job = db.session.get(ImportJob, job_id)
+            if job is None:
+                return
+            manager.process_file(filepath, job.program_id, duplicate_strategy=job.duplicate_strategy, job=job,
+                                 withdraw_missing=bool(job.withdraw_missing))
+        except Exception as e:
+            app.logger.exception('Import job %s failed', job_id)
+            db.session.rollback()
+            job = db.session.get(ImportJob, job_id)
+            if job is not None:
+                job.status = 'failed'
+                job.message = f"Error processing file: {str(e)}"
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+        finally:
+            db.session.remove()
+            if os.path.exists(filepath):
+                os.remove(filepath)
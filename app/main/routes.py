@@ -1,10 +1,14 @@
-from flask import render_template, request, redirect, url_for, flash, jsonify, send_file, current_app, Response
+from flask import render_template, request, redirect, url_for, flash, jsonify, send_file, current_app, Response, abort
 from flask_login import login_required, current_user
 from app.main import bp
 from .. import db
-from ..models import Student, Group, Program, Movement, Membership, WeeklyGroupName, WeeklyInstructorAssignment, User
-from ..snowsports_manager import SnowsportsManager
+from ..models import Student, Group, Program, Movement, Membership, WeeklyGroupName, WeeklyInstructorAssignment, User, ImportJob, GroupingConstraint
+from ..snowsports_manager import SnowsportsManager, load_constraints, load_students, load_weekly_roster, parse_age_bands
+from ..import_jobs import enqueue_import
+from ..regeneration import regenerate_programs
+from ..student_search import search_students
 import os
+import base64
 from werkzeug.utils import secure_filename
 import pandas as pd
 from datetime import datetime
@@ -18,8 +22,6 @@ manager = SnowsportsManager()
 def index():
     """Home page with program overview."""
     try:
-        from ..models import Program, Group, Student, Membership
-        
         programs = Program.query.filter_by(active=True).order_by(Program.name).all()
         groups = {}
         students = {}
@@ -30,38 +32,43 @@ def index():
         if programs:
             program = programs[0]
             
-            # Get all groups for the program with student counts
-            groups = {}
-            for group in program.groups.all():
-                # Get active memberships for this group
-                student_count = Membership.query.filter_by(
-                    group_id=group.id, 
-                    is_active=True
-                ).count()
-                
-                groups[str(group.id)] = {
-                    'id': group.id,
-                    'name': group.name,
-                    'instructor': group.instructor if hasattr(group, 'instructor') else None,
-                    'notes': group.notes if hasattr(group, 'notes') else None,
-                    'student_count': student_count
+            # All groups for the program with active member counts (one GROUP BY)
+            group_rows = db.session.execute(
+                db.select(Group.id, Group.name, Group.notes, db.func.count(Membership.id).label('student_count'))
+                .outerjoin(Membership, db.and_(Membership.group_id == Group.id, Membership.is_active == True))
+                .where(Group.program_id == program.id)
+                .group_by(Group.id)
+                .order_by(Group.name)
+            ).all()
+            groups = {
+                str(row.id): {
+                    'id': row.id,
+                    'name': row.name,
+                    'instructor': None,
+                    'notes': row.notes,
+                    'student_count': row.student_count
                 }
+                for row in group_rows
+            }
             
-            # Get all students in the program with their group assignments
-            students = {}
-            for student in program.students.all():
-                # Get active membership for this student
-                membership = Membership.query.filter_by(
-                    student_id=student.id,
-                    is_active=True
-                ).first()
-                
-                students[str(student.id)] = {
-                    'id': student.id,
-                    'name': student.name,
-                    'ability_level': student.ability_level,
-                    'group_id': str(membership.group_id) if membership else None
+            # All students in the program with their group, joined in one query
+            first_active = first_active_memberships()
+            student_rows = db.session.execute(
+                db.select(Student.id, Student.name, Student.ability_level, Membership.group_id)
+                .outerjoin(first_active, first_active.c.student_id == Student.id)
+                .outerjoin(Membership, Membership.id == first_active.c.membership_id)
+                .where(Student.program_id == program.id)
+                .order_by(Student.name)
+            ).all()
+            students = {
+                str(row.id): {
+                    'id': row.id,
+                    'name': row.name,
+                    'ability_level': row.ability_level,
+                    'group_id': str(row.group_id) if row.group_id else None
                 }
+                for row in student_rows
+            }
         
         return render_template(
             'index.html',
@@ -95,31 +102,114 @@ def programs():
 @bp.route('/students')
 @login_required
 def students():
-    """Display all students with filtering and search capabilities."""
+    """Students list, filtered on the server and paginated by (name, id)."""
+    filters = {key: (request.args.get(key) or '').strip() for key in ('program_id', 'ability', 'group_id', 'q')}
+    per_page = current_app.config.get('PAGINATION_PER_PAGE', 20)
     try:
-        # Get all students (membership relationship is dynamic; avoid eager loading)
-        students = Student.query.order_by(Student.name).all()
-        
-        # Get unique ability levels for filter dropdown
-        abilities = db.session.query(Student.ability_level).distinct().filter(
-            Student.ability_level.isnot(None)
-        ).order_by(Student.ability_level).all()
-        abilities = [a[0] for a in abilities if a[0]]
-        
-        # Get all groups for filter dropdown
-        groups = Group.query.order_by(Group.name).all()
+        # Each student with their active membership's group (one joined query per page)
+        first_active = first_active_memberships()
+
+        def with_group(stmt):
+            return (stmt.outerjoin(first_active, first_active.c.student_id == Student.id)
+                    .outerjoin(Membership, Membership.id == first_active.c.membership_id)
+                    .outerjoin(Group, Group.id == Membership.group_id))
+
+        conditions = []
+        if filters['program_id']:
+            conditions.append(Student.program_id == filters['program_id'])
+        if filters['ability']:
+            conditions.append(Student.ability_level == filters['ability'])
+        if filters['group_id']:
+            conditions.append(Group.id == filters['group_id'])
+        for term in filters['q'].split():
+            pattern = contains_pattern(term)
+            conditions.append(db.or_(*(column.ilike(pattern, escape='\\') for column in (
+                Student.name, Student.contact_email, Student.emergency_contact, Student.emergency_phone))))
+
+        # Keyset pagination: the page starts after the cursor's (name, id)
+        page = with_group(db.select(Student, Group.id, Group.name)).where(*conditions)
+        after = decode_cursor(request.args.get('after'))
+        if after:
+            page = page.where(db.or_(Student.name > after[0],
+                                     db.and_(Student.name == after[0], Student.id > after[1])))
+        rows = db.session.execute(page.order_by(Student.name, Student.id).limit(per_page + 1)).all()
+        next_cursor = encode_cursor(rows[per_page - 1][0]) if len(rows) > per_page else None
+        rows = rows[:per_page]
+
+        count = db.select(db.func.count(Student.id))
+        if filters['group_id']:
+            count = with_group(count)
+        total = db.session.execute(count.where(*conditions)).scalar()
+
+        students = [student for student, _, _ in rows]
+        memberships = {
+            student.id: {'group_id': group_id, 'group_name': group_name}
+            for student, group_id, group_name in rows if group_id
+        }
+
+        # Filter dropdowns, narrowed to the selected program
+        abilities = db.select(Student.ability_level).distinct().where(Student.ability_level.isnot(None))
+        groups = Group.query.order_by(Group.name)
+        if filters['program_id']:
+            abilities = abilities.where(Student.program_id == filters['program_id'])
+            groups = groups.filter_by(program_id=filters['program_id'])
+        abilities = [a for a in db.session.execute(abilities.order_by(Student.ability_level)).scalars() if a]
         
         return render_template(
             'students.html',
             students=students,
+            memberships=memberships,
+            total=total,
+            filters=filters,
+            page_args={key: value for key, value in filters.items() if value},
+            next_cursor=next_cursor,
+            is_first_page=after is None,
+            programs=Program.query.order_by(Program.name).all(),
             abilities=abilities,
-            groups=groups,
+            groups=groups.all(),
             now=datetime.utcnow()
         )
     except Exception as e:
         current_app.logger.error(f"Error loading students: {str(e)}")
         flash('Error loading student data', 'error')
-        return render_template('students.html', students=[], abilities=[], groups=[])
+        return render_template('students.html', students=[], memberships={}, total=0, filters=filters,
+                               page_args={}, next_cursor=None, is_first_page=True, programs=[], abilities=[], groups=[])
+
+@bp.route('/api/students/search')
+@login_required
+def search_students_api():
+    """Autocomplete search: ranked students matching ``q``, optionally within ``program_id``."""
+    query = request.args.get('q', '')
+    if len(query.strip()) < 2:
+        return jsonify({'success': True, 'results': []})
+    try:
+        ids = search_students(db.session, query, request.args.get('program_id') or None,
+                              request.args.get('limit', 20, type=int))
+        first_active = first_active_memberships()
+        rows = db.session.execute(
+            db.select(Student, Group.id, Group.name)
+            .outerjoin(first_active, first_active.c.student_id == Student.id)
+            .outerjoin(Membership, Membership.id == first_active.c.membership_id)
+            .outerjoin(Group, Group.id == Membership.group_id)
+            .where(Student.id.in_(ids))
+        ).all()
+    except Exception as e:
+        current_app.logger.error(f"Student search failed: {str(e)}")
+        return jsonify({'success': False, 'message': 'Search failed'}), 500
+    by_id = {student.id: (student, group_id, group_name) for student, group_id, group_name in rows}
+    results = []
+    for student_id in ids:
+        student, group_id, group_name = by_id[student_id]
+        results.append({
+            'id': student.id,
+            'name': student.name,
+            'ability': student.ability_level,
+            'age': student.age,
+            'program_id': student.program_id,
+            'group_id': group_id,
+            'group': group_name,
+        })
+    return jsonify({'success': True, 'results': results})
 
 @bp.route('/groups')
 @login_required
@@ -156,53 +246,9 @@ def groups_weekly_view(program_id, week_number=None):
         flash(f'Invalid week number. Program has {program.max_weeks or 6} weeks.', 'warning')
         week_number = program.current_week or 1
 
-    # Get all groups for this program
-    groups = Group.query.filter_by(program_id=program_id).order_by(Group.name).all()
-
-    # Prepare data for template
-    groups_data = []
-    for g in groups:
-        # Weekly name overlay (fallback to base name)
-        weekly_name = None
-        try:
-            weekly_name = WeeklyGroupName.query.filter_by(group_id=g.id, week_number=week_number).first()
-        except Exception:
-            weekly_name = None
-
-        # Active members for this week
-        members = []
-        try:
-            members = Membership.query.filter_by(group_id=g.id, week_number=week_number, is_active=True).all()
-        except Exception:
-            members = []
-
-        # Instructor for this week
-        instructor_name = None
-        try:
-            assignment = WeeklyInstructorAssignment.query.filter_by(group_id=g.id, week_number=week_number).first()
-            if assignment and assignment.instructor_id:
-                inst = User.query.get(assignment.instructor_id)
-                instructor_name = inst.username if inst else None
-        except Exception:
-            instructor_name = None
-
-        groups_data.append({
-            'group': g,
-            'weekly_name': weekly_name.name if weekly_name else g.name,
-            'members': members,
-            'instructor': instructor_name,
-        })
-
-    # Unassigned students this week
-    assigned_ids_subq = db.session.query(Membership.student_id).filter(
-        Membership.week_number == week_number,
-        Membership.is_active == True,
-        Membership.group_id.in_([gg.id for gg in groups])
-    ).subquery()
-    unassigned_students = Student.query.filter(
-        Student.program_id == program.id,
-        ~Student.id.in_(assigned_ids_subq)
-    ).order_by(Student.name).all()
+    # Groups with their weekly names, members and instructors
+    rosters, unassigned_students = load_weekly_roster(db.session, program.id, week_number)
+    groups_data = list(rosters.values())
 
     available_weeks = list(range(1, (program.max_weeks or 6) + 1))
 
@@ -222,11 +268,36 @@ def groups_weekly_view(program_id, week_number=None):
         instructors=instructors,
     )
 
+@bp.route('/api/programs/<program_id>/groups/week/<int:week_number>', methods=['GET'])
+@login_required
+def api_groups_weekly(program_id, week_number):
+    """JSON version of the weekly groups page."""
+    program = Program.query.get_or_404(program_id)
+    rosters, unassigned = load_weekly_roster(db.session, program.id, week_number)
+
+    def student_dict(st):
+        return {'id': st.id, 'name': st.name, 'age': st.age, 'ability_level': st.ability_level}
+
+    return jsonify({
+        'program_id': program.id,
+        'week_number': week_number,
+        'groups': [{
+            'id': r['group'].id,
+            'name': r['weekly_name'],
+            'ability_level': r['group'].ability_level,
+            'max_size': r['group'].max_size,
+            'instructor_id': r['instructor_id'],
+            'instructor': r['instructor'],
+            'students': [student_dict(m.student) for m in r['members']],
+        } for r in rosters.values()],
+        'unassigned': [student_dict(st) for st in unassigned],
+    })
+
 @bp.route('/api/groups/<group_id>/rename', methods=['PUT'])
 @login_required
 def rename_group_weekly(group_id):
     data = request.get_json() or {}
-    week_number = data.get('week_number', type=int)
+    week_number = json_week_number(data)
     new_name = (data.get('name') or '').strip()
     if not new_name or not week_number:
         return jsonify({'error': 'Invalid payload'}), 400
@@ -247,8 +318,10 @@ def rename_group_weekly(group_id):
 @login_required
 def assign_instructor_weekly(group_id):
     data = request.get_json() or {}
-    week_number = data.get('week_number', type=int)
+    week_number = json_week_number(data)
     instructor_id = data.get('instructor_id')
+    if not week_number:
+        return jsonify({'error': 'Invalid payload'}), 400
     group = Group.query.get_or_404(group_id)
     try:
         rec = WeeklyInstructorAssignment.query.filter_by(group_id=group.id, week_number=week_number).first()
@@ -267,7 +340,7 @@ def assign_instructor_weekly(group_id):
 @login_required
 def move_student_weekly(student_id):
     data = request.get_json() or {}
-    week_number = data.get('week_number', type=int)
+    week_number = json_week_number(data)
     new_group_id = data.get('group_id')
     if not (week_number and new_group_id):
         return jsonify({'error': 'Invalid payload'}), 400
@@ -298,10 +371,12 @@ def move_student_weekly(student_id):
 def bulk_move_students():
     data = request.get_json() or {}
     student_ids = data.get('student_ids') or []
-    week_number = data.get('week_number', type=int)
+    week_number = json_week_number(data)
     new_group_id = data.get('group_id')
     if not student_ids:
         return jsonify({'error': 'No students provided'}), 400
+    if not week_number:
+        return jsonify({'error': 'Invalid payload'}), 400
     new_group = Group.query.get_or_404(new_group_id)
     # capacity check
     current_count = Membership.query.filter_by(group_id=new_group.id, week_number=week_number, is_active=True).count()
@@ -347,14 +422,146 @@ def generate_groups_weekly(program_id):
     program = Program.query.get_or_404(program_id)
     week = request.form.get('week_number', type=int) or program.current_week or 1
     max_size = request.form.get('max_size', type=int) or 8
+    algorithm = request.form.get('algorithm') or current_app.config.get('GROUPING_ALGORITHM', 'snake')
     try:
-        created = manager.create_groups_weekly(program_id, week_number=week, max_group_size=max_size)
-        flash(f'Generated {created} groups for week {week}.', 'success')
+        created, unplaced = manager.create_groups_weekly(program_id, week_number=week, max_group_size=max_size,
+                                                         algorithm=algorithm,
+                                                         time_budget=current_app.config.get('GROUPING_TIME_BUDGET'),
+                                                         age_bands=parse_age_bands(request.form.get('age_bands')))
+        flash(f'Generated {created} groups for week {week}.' + unplaced_message(unplaced),
+              'warning' if unplaced else 'success')
     except Exception as e:
         current_app.logger.exception('Error generating weekly groups')
         flash(f'Error generating groups: {str(e)}', 'danger')
     return redirect(url_for('main.groups_weekly_view', program_id=program_id, week_number=week))
 
+@bp.route('/programs/<program_id>/generate_season', methods=['POST'])
+@login_required
+def generate_season(program_id):
+    """Generate week 1 groups and copy them forward to every week of the program in one go."""
+    Program.query.get_or_404(program_id)
+    max_size = request.form.get('max_size', type=int) or 8
+    algorithm = request.form.get('algorithm') or current_app.config.get('GROUPING_ALGORITHM', 'snake')
+    try:
+        created, weeks, unplaced = manager.generate_season(
+            program_id, max_group_size=max_size, algorithm=algorithm,
+            time_budget=current_app.config.get('GROUPING_TIME_BUDGET'),
+            age_bands=parse_age_bands(request.form.get('age_bands')))
+        flash(f'Generated {created} groups for weeks 1-{weeks}.' + unplaced_message(unplaced),
+              'warning' if unplaced else 'success')
+    except Exception as e:
+        current_app.logger.exception('Error generating season')
+        flash(f'Error generating season: {str(e)}', 'danger')
+    return redirect(url_for('main.groups_weekly_view', program_id=program_id, week_number=1))
+
+@bp.route('/api/programs/<program_id>/groups/preview', methods=['POST'])
+@login_required
+def preview_groups(program_id):
+    """What-if grouping: proposed rosters and metrics for one or more parameter sets, nothing saved.
+
+    Body: ``{"candidates": [{"max_size": 6, "algorithm": "optimize", "age_bands": [8, 11]}, ...]}``,
+    or the fields of a single candidate at the top level.
+    """
+    Program.query.get_or_404(program_id)
+    data = request.get_json(silent=True) or request.form.to_dict()
+    candidates = data.get('candidates') or [data]
+    if not isinstance(candidates, list) or not all(isinstance(c, dict) for c in candidates):
+        return jsonify({'error': 'candidates must be a list of objects'}), 400
+    try:
+        students, previews = manager.preview_groups(
+            program_id, candidates, time_budget=current_app.config.get('GROUPING_TIME_BUDGET')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        db.session.rollback()  # read-only: end the transaction, never flush
+    return jsonify({'program_id': program_id, 'students': students, 'previews': previews})
+
+@bp.route('/api/programs/<program_id>/constraints', methods=['GET'])
+@login_required
+def list_constraints(program_id):
+    """Coordinators' grouping rules, plus how many family pairs are kept together by default."""
+    Program.query.get_or_404(program_id)
+    rows = GroupingConstraint.query.filter_by(program_id=program_id).order_by(GroupingConstraint.id).all()
+    family = current_app.config.get('GROUPING_FAMILY_CONSTRAINTS', 'soft')
+    rules = load_constraints(db.session, program_id, load_students(db.session, program_id), family)
+    return jsonify({
+        'constraints': [r.to_dict() for r in rows],
+        'family_mode': family,
+        'family_pairs': len(rules['together']) - sum(1 for r in rows if r.kind == 'together'),
+    })
+
+@bp.route('/api/programs/<program_id>/constraints', methods=['POST'])
+@login_required
+def add_constraint(program_id):
+    """Add a rule: ``{"kind": "together"|"apart"|"pin", "student_ids": [...], "group_name": ..., "hard": true}``."""
+    Program.query.get_or_404(program_id)
+    data = request.get_json() or {}
+    try:
+        rows = manager.add_constraint(
+            program_id, data.get('kind'), data.get('student_ids') or [], group_name=data.get('group_name'),
+            hard=data.get('hard', True), user_id=current_user.id,
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'success': True, 'constraints': [r.to_dict() for r in rows]}), 201
+
+@bp.route('/api/constraints/<int:constraint_id>', methods=['DELETE'])
+@login_required
+def delete_constraint(constraint_id):
+    constraint = GroupingConstraint.query.get_or_404(constraint_id)
+    db.session.delete(constraint)
+    db.session.commit()
+    return jsonify({'success': True})
+
+@bp.route('/admin/regenerate_groups', methods=['POST'])
+@login_required
+def regenerate_groups():
+    """Admin: regenerate every week of groups for several programs in parallel.
+
+    Takes ``program_ids`` (JSON list or repeated form field; default: all
+    active programs), ``max_size`` and ``algorithm``; returns one result per program.
+    """
+    if not current_user.is_admin:
+        abort(403)
+    data = request.get_json(silent=True) or {}
+    program_ids = data.get('program_ids') or request.form.getlist('program_ids') or None
+    max_size = int(data.get('max_size') or request.form.get('max_size', type=int) or 8)
+    algorithm = data.get('algorithm') or request.form.get('algorithm') or current_app.config.get('GROUPING_ALGORITHM', 'snake')
+    results = regenerate_programs(
+        current_app._get_current_object(),
+        program_ids,
+        max_group_size=max_size,
+        algorithm=algorithm,
+        time_budget=current_app.config.get('GROUPING_TIME_BUDGET'),
+    )
+    return jsonify({
+        'results': results,
+        'succeeded': sum(1 for r in results if r['success']),
+        'failed': sum(1 for r in results if not r['success']),
+    })
+
+@bp.route('/programs/<program_id>/place_weekly', methods=['POST'])
+@login_required
+def place_students_weekly(program_id):
+    """Place students without a group this week into existing groups, leaving everyone else in place."""
+    program = Program.query.get_or_404(program_id)
+    week = request.form.get('week_number', type=int) or program.current_week or 1
+    max_size = request.form.get('max_size', type=int) or 8
+    try:
+        placed, unplaced = manager.place_unassigned_weekly(program_id, week_number=week, max_group_size=max_size)
+        if placed or unplaced:
+            message = f'Placed {placed} new students in week {week}.'
+            if unplaced:
+                message += f' {unplaced} had no group with room for their ability; regenerate or add a group.'
+            flash(message, 'warning' if unplaced else 'success')
+        else:
+            flash(f'Everyone already has a group in week {week}.', 'info')
+    except Exception as e:
+        current_app.logger.exception('Error placing students')
+        flash(f'Error placing students: {str(e)}', 'danger')
+    return redirect(url_for('main.groups_weekly_view', program_id=program_id, week_number=week))
+
 @bp.route('/programs/<program_id>/generate_groups', methods=['POST'])
 @login_required
 def generate_groups(program_id):
@@ -378,6 +585,7 @@ def upload_file():
         program_id = request.form.get('program_id')
         new_program_name = request.form.get('program_name', '').strip()
         duplicate_strategy = request.form.get('duplicate_strategy', 'skip')
+        withdraw_missing = duplicate_strategy == 'sync' and bool(request.form.get('withdraw_missing'))
         
         if file.filename == '':
             flash('No selected file')
@@ -387,7 +595,8 @@ def upload_file():
             filename = secure_filename(file.filename)
             upload_folder = current_app.config.get('UPLOAD_FOLDER', os.path.join(current_app.instance_path, 'uploads'))
             os.makedirs(upload_folder, exist_ok=True)
-            filepath = os.path.join(upload_folder, filename)
+            # Unique on-disk name: queued imports may share an original filename
+            filepath = os.path.join(upload_folder, f"{uuid4().hex}_{filename}")
             file.save(filepath)
             
             # If no program selected, create a new one if a name is provided
@@ -405,13 +614,17 @@ def upload_file():
                 flash('Please select an existing program or enter a new program name.', 'warning')
                 return redirect(url_for('main.upload_file'))
 
-            success, message = manager.process_file(filepath, program_id, duplicate_strategy=duplicate_strategy)
-            flash(message)
-            
-            # Clean up the uploaded file
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                
+            # Run the import on the background pool; the worker removes the file
+            job_id = enqueue_import(manager, filepath, filename, program_id, duplicate_strategy, withdraw_missing)
+            status_url = url_for('main.import_status', job_id=job_id)
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return jsonify({'job_id': job_id, 'status_url': status_url}), 202
+
+            job = ImportJob.query.get(job_id)
+            if job and job.status in ('succeeded', 'failed'):
+                flash(job.message)
+            else:
+                flash(f"Import of '{filename}' queued (job {job_id}). Progress: {status_url}", 'info')
             return redirect(url_for('main.index'))
     
     # GET: render upload page with existing programs
@@ -421,9 +634,62 @@ def upload_file():
         programs = []
     return render_template('upload.html', programs=programs)
 
+@bp.route('/api/imports/<job_id>')
+@login_required
+def import_status(job_id):
+    """Report state, progress (rows processed, rows/sec), counts and errors of an import."""
+    job = ImportJob.query.get_or_404(job_id)
+    data = job.to_dict()
+    data['error'] = job.message if job.status == 'failed' else None
+    return jsonify(data)
+
 def allowed_file(filename):
     """Check if the file has an allowed extension."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in {'csv', 'xlsx', 'xls'}
 
+def first_active_memberships():
+    """Subquery of (student_id, membership_id): each student's earliest active membership."""
+    return (
+        db.select(Membership.student_id, db.func.min(Membership.id).label('membership_id'))
+        .where(Membership.is_active == True)
+        .group_by(Membership.student_id)
+        .subquery()
+    )
+
+def unplaced_message(unplaced):
+    """Flash text for students a generation left without a group ('' for none)."""
+    if not unplaced:
+        return ''
+    return (f' {unplaced} students could not be placed: their hard together / apart rules or pins '
+            f'leave no group they can join; review the constraints.')
+
+def contains_pattern(term):
+    """LIKE pattern matching ``term`` anywhere, with '%', '_' and '\\' matched literally (escape '\\')."""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+def encode_cursor(student):
+    """Opaque keyset cursor for the students list: the (name, id) of the last row shown."""
+    return base64.urlsafe_b64encode(json.dumps([student.name, student.id]).encode()).decode()
+
+def decode_cursor(cursor):
+    """(name, id) from ``encode_cursor``, or None for a missing or malformed cursor (first page)."""
+    if not cursor:
+        return None
+    try:
+        name, student_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not (isinstance(name, str) and isinstance(student_id, str)):
+        return None
+    return name, student_id
+
+def json_week_number(data):
+    """Week number from a JSON payload, or None if missing or not a number."""
+    try:
+        return int(data.get('week_number'))
+    except (TypeError, ValueError):
+        return None
+
 # Add more routes as needed
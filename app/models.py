@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -93,12 +94,21 @@ class Student(db.Model):
     food_allergy = db.Column(db.Text)
     medication = db.Column(db.Text)
     special_condition = db.Column(db.Text)
+    # Booking references from the report: students sharing one were booked by the same family
+    parent_id = db.Column(db.String(64))
+    order_id = db.Column(db.String(64))
     program_id = db.Column(db.String(36), db.ForeignKey('programs.id'))
     
     # Relationships
     memberships = db.relationship('Membership', backref='student', lazy='dynamic')
     notes = db.relationship('Note', backref='student', lazy='dynamic')
 
+    # Keyset pagination of the students list orders by (name, id)
+    __table_args__ = (
+        db.Index('ix_students_name_id', 'name', 'id'),
+        db.Index('ix_students_program_name_id', 'program_id', 'name', 'id'),
+    )
+
     @property
     def age(self):
         """Compute age in years from birth_date. Returns None if missing."""
@@ -165,6 +175,94 @@ class WeeklyInstructorAssignment(db.Model):
         db.Index('ix_weekly_instructor_assignments_lookup', 'group_id', 'week_number'),
     )
 
+class GroupingConstraint(db.Model):
+    """A coordinator's grouping rule: keep two students together or apart, or pin one to a group.
+
+    Pins name the group (e.g. 'FT Group 2') so they survive regeneration,
+    which recreates group rows under the same names.
+    """
+    __tablename__ = 'grouping_constraints'
+    KINDS = ('together', 'apart', 'pin')
+
+    id = db.Column(db.Integer, primary_key=True)
+    program_id = db.Column(db.String(36), db.ForeignKey('programs.id'), nullable=False, index=True)
+    kind = db.Column(db.String(10), nullable=False)  # together | apart | pin
+    student_id = db.Column(db.String(36), db.ForeignKey('students.id'), nullable=False)
+    other_student_id = db.Column(db.String(36), db.ForeignKey('students.id'))  # together / apart
+    group_name = db.Column(db.String(128))  # pin
+    hard = db.Column(db.Boolean, default=True, nullable=False)
+    created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'program_id': self.program_id,
+            'kind': self.kind,
+            'student_id': self.student_id,
+            'other_student_id': self.other_student_id,
+            'group_name': self.group_name,
+            'hard': self.hard,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+class ImportJob(db.Model):
+    """Progress and outcome of a student file import."""
+    __tablename__ = 'import_jobs'
+    id = db.Column(db.String(36), primary_key=True)
+    program_id = db.Column(db.String(36), db.ForeignKey('programs.id'), index=True)
+    filename = db.Column(db.String(255))
+    duplicate_strategy = db.Column(db.String(20))
+    withdraw_missing = db.Column(db.Boolean, default=False)  # 'sync' only
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending | running | succeeded | failed
+    rows_processed = db.Column(db.Integer, default=0, nullable=False)
+    rows_per_sec = db.Column(db.Float, default=0.0)
+    created_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_count = db.Column(db.Integer, default=0, nullable=False)
+    skipped_count = db.Column(db.Integer, default=0, nullable=False)
+    message = db.Column(db.Text)
+    details = db.Column(db.Text)  # JSON roster diff for 'sync' imports
+    # Upload cache: sha256 of file bytes + program + strategy, and of the roster after the import
+    fingerprint = db.Column(db.String(64), index=True)
+    roster_signature = db.Column(db.String(64))
+    reused_job_id = db.Column(db.String(36))  # earlier job whose result was reused
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    program = db.relationship('Program')
+
+    def record_progress(self, rows_processed, created, updated, skipped):
+        """Store running counts and throughput since ``started_at``."""
+        self.rows_processed = rows_processed
+        self.created_count = created
+        self.updated_count = updated
+        self.skipped_count = skipped
+        if self.started_at:
+            elapsed = (datetime.utcnow() - self.started_at).total_seconds()
+            self.rows_per_sec = round(rows_processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'program_id': self.program_id,
+            'filename': self.filename,
+            'duplicate_strategy': self.duplicate_strategy,
+            'status': self.status,
+            'rows_processed': self.rows_processed,
+            'rows_per_sec': self.rows_per_sec,
+            'created': self.created_count,
+            'updated': self.updated_count,
+            'skipped': self.skipped_count,
+            'message': self.message,
+            'details': json.loads(self.details) if self.details else None,
+            'fingerprint': self.fingerprint,
+            'reused_job_id': self.reused_job_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
 class Movement(db.Model):
     """Tracks student movements between groups."""
     __tablename__ = 'movements'
@@ -0,0 +1,126 @@
+"""
+Group regeneration - rebuilds the groups of many programs across CPU cores.
+
+Each program is one task on a process pool. A worker opens its own
+SQLAlchemy session straight from the database URL (no Flask app), loads the
+program's students as plain rows, plans the groups with the grouping engine
+and writes the season (see ``write_season``) in its own transaction. Planning
+runs in parallel; on SQLite, where only one writer can hold the database,
+the write transactions are serialized with a lock shared by the workers.
+Results are reported per program, so one failure does not stop the others.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from .models import db, Program
+from .snowsports_manager import load_constraints, load_students, plan_weekly_groups, write_season
+
+_engine = None
+_write_lock = None
+
+
+def _init_worker(database_uri, write_lock):
+    """Process pool initializer: one engine (and session per task) for each worker."""
+    global _engine, _write_lock
+    connect_args = {'timeout': 30} if database_uri.startswith('sqlite') else {}
+    _engine = create_engine(database_uri, connect_args=connect_args)
+    _write_lock = write_lock
+
+
+def regenerate_program(program_id, max_group_size=8, algorithm='snake', time_budget=None, session=None,
+                       family='soft'):
+    """Regenerate every week of one program; returns a result dict instead of raising.
+
+    Uses ``session`` if given (in-process runs), otherwise a new session on
+    the worker's engine. ``family`` is the GROUPING_FAMILY_CONSTRAINTS mode
+    (see ``load_constraints``).
+    """
+    started = time.perf_counter()
+    result = {'program_id': program_id, 'success': False}
+    own_session = session is None
+    if own_session:
+        session = Session(_engine)
+    try:
+        program = session.execute(
+            db.select(Program.name, Program.max_weeks).where(Program.id == program_id)
+        ).first()
+        if program is None:
+            raise ValueError("Program not found")
+        result['name'] = program.name
+        students = load_students(session, program_id)
+        if not students:
+            raise ValueError("No students found in program")
+        constraints = load_constraints(session, program_id, students, family)
+        session.rollback()  # release the read transaction before planning
+
+        weeks = program.max_weeks or 6
+        new_groups, memberships = plan_weekly_groups(
+            program_id, 1, students, (), max_group_size, algorithm, time_budget, constraints=constraints
+        )
+        lock = _write_lock if own_session else None
+        if lock is not None:
+            lock.acquire()
+        try:
+            write_season(session, program_id, weeks, new_groups, memberships)
+            session.commit()
+        finally:
+            if lock is not None:
+                lock.release()
+        result.update(success=True, groups=len(new_groups), students=len(students), weeks=weeks,
+                      unplaced=len(students) - len(memberships))
+    except Exception as e:
+        session.rollback()
+        result['error'] = str(e)
+    finally:
+        if own_session:
+            session.close()
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def regenerate_programs(app, program_ids=None, workers=None, max_group_size=8, algorithm='snake', time_budget=None):
+    """Regenerate groups for ``program_ids`` (default: all active programs).
+
+    Must be called inside an app context. Runs on a process pool of
+    ``workers`` (default REGENERATION_WORKERS, or the CPU count); an
+    in-memory SQLite database cannot be shared, so it runs in-process.
+
+    Returns:
+        list[dict]: One result per program, in the order requested
+    """
+    if program_ids is None:
+        program_ids = [pid for (pid,) in db.session.execute(
+            db.select(Program.id).where(Program.active == True).order_by(Program.name)
+        )]
+    if not program_ids:
+        return []
+
+    url = db.engine.url
+    in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+    workers = workers or app.config.get('REGENERATION_WORKERS') or os.cpu_count() or 1
+    options = dict(max_group_size=max_group_size, algorithm=algorithm, time_budget=time_budget,
+                   family=app.config.get('GROUPING_FAMILY_CONSTRAINTS', 'soft'))
+
+    if in_memory or workers == 1:
+        results = []
+        for pid in program_ids:
+            results.append(regenerate_program(pid, session=db.session, **options))
+        return results
+
+    # Spawned workers start clean (no inherited connections or threads)
+    ctx = multiprocessing.get_context('spawn')
+    write_lock = ctx.Lock() if url.get_backend_name() == 'sqlite' else None
+    db.session.remove()
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(program_ids)),
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(url.render_as_string(hide_password=False), write_lock),
+    ) as pool:
+        futures = [pool.submit(regenerate_program, pid, **options) for pid in program_ids]
+        return [f.result() for f in futures]
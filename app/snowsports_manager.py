@@ -2,11 +2,431 @@
 Snowsports Manager - Handles the core business logic for managing snowsports programs.
 """
 import os
-import pandas as pd
-from datetime import datetime
+import json
+import math
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import combinations
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy.orm.attributes import set_committed_value
 from uuid import uuid4
-from .models import db, Student, Group, Program, Movement, User, Membership
+from .models import (
+    db, Student, Group, Program, Movement, User, Membership, ImportJob, WeeklyGroupName, WeeklyInstructorAssignment,
+    GroupingConstraint,
+)
+from .student_import import (
+    CACHEABLE_STRATEGIES, RosterSync, StudentIndex, StudentWriter, candidate_ids, file_fingerprint, iter_frames,
+    normalize_columns, normalize_students, resolve_columns, roster_signature,
+)
 from werkzeug.utils import secure_filename
+from abilities import ABILITY_LABELS, normalize_ability
+from grouping_engine import ALGORITHMS, Constraints, assign_groups, place_students
+
+# What-if previews plan everything in memory; cap the work one request can ask for
+PREVIEW_MAX_CANDIDATES = 10
+
+# Students sharing a ParentID / OrderID are kept together by default; larger shared
+# sets are bulk bookings (e.g. a whole school class), not families
+FAMILY_GROUP_LIMIT = 4
+FAMILY_MODES = ('soft', 'hard', 'off')
+
+
+def norm_ability(val: str) -> str:
+    """Map an ability label onto a weekly bucket code (see ``abilities``), MIXED or as-is."""
+    code = normalize_ability(val)
+    if code:
+        return code
+    v = (val or '').strip().upper()
+    if v in {'', 'UNKNOWN', 'N/A', 'NA', 'NONE'}:
+        return 'MIXED'
+    return v  # keep as-is but bucketed separately
+
+
+def load_students(session, program_id):
+    """Plain (id, name, ability_level, birth_date, parent_id, order_id) rows for a program's students."""
+    return session.execute(
+        db.select(Student.id, Student.name, Student.ability_level, Student.birth_date,
+                  Student.parent_id, Student.order_id)
+        .where(Student.program_id == program_id)
+    ).all()
+
+
+def load_constraints(session, program_id, students, family='soft'):
+    """Grouping rules for a program: coordinators' constraints plus family defaults.
+
+    Students sharing a ParentID or OrderID (sets of up to FAMILY_GROUP_LIMIT)
+    are kept together - as soft rules, hard rules with ``family='hard'``, or
+    not at all with 'off'. An explicit rule for a pair replaces its default.
+
+    Returns:
+        dict: ``together`` / ``apart`` lists of (student_id, student_id, hard)
+        and ``pins`` mapping student_id -> group name
+    """
+    if family not in FAMILY_MODES:
+        raise ValueError(f"Unknown family constraint mode: {family}")
+    rules = {'together': [], 'apart': [], 'pins': {}}
+    covered = set()
+    rows = session.execute(
+        db.select(GroupingConstraint.kind, GroupingConstraint.student_id, GroupingConstraint.other_student_id,
+                  GroupingConstraint.group_name, GroupingConstraint.hard)
+        .where(GroupingConstraint.program_id == program_id)
+        .order_by(GroupingConstraint.id)
+    )
+    for row in rows:
+        if row.kind == 'pin':
+            if row.group_name:
+                rules['pins'][row.student_id] = row.group_name
+        elif row.kind in ('together', 'apart') and row.other_student_id:
+            rules[row.kind].append((row.student_id, row.other_student_id, bool(row.hard)))
+            covered.add(frozenset((row.student_id, row.other_student_id)))
+
+    if family != 'off':
+        for key in ('parent_id', 'order_id'):
+            booked = defaultdict(list)
+            for st in students:
+                if getattr(st, key, None):
+                    booked[getattr(st, key)].append(st.id)
+            for ids in booked.values():
+                if len(ids) > FAMILY_GROUP_LIMIT:
+                    continue
+                for a, b in combinations(ids, 2):
+                    if frozenset((a, b)) not in covered:
+                        covered.add(frozenset((a, b)))
+                        rules['together'].append((a, b, family == 'hard'))
+    return rules
+
+
+def load_weekly_roster(session, program_id, week_number):
+    """One week's groups with their weekly names, members and instructors, in four queries.
+
+    Returns:
+        tuple: (rosters, unassigned) - ``rosters`` maps group id -> dict with
+        ``group``, ``weekly_name`` (falls back to the group name), ``members``
+        (active Memberships, each with its ``student`` loaded),
+        ``instructor_id`` and ``instructor``, in group name order;
+        ``unassigned`` lists the program's Students without a group that week
+    """
+    groups = session.execute(
+        db.select(Group).where(Group.program_id == program_id).order_by(Group.name)
+    ).scalars().all()
+    rosters = {
+        g.id: {'group': g, 'weekly_name': g.name, 'members': [], 'instructor_id': None, 'instructor': None}
+        for g in groups
+    }
+    program_groups = db.select(Group.id).where(Group.program_id == program_id)
+
+    names = session.execute(
+        db.select(WeeklyGroupName.group_id, WeeklyGroupName.name)
+        .where(WeeklyGroupName.group_id.in_(program_groups), WeeklyGroupName.week_number == week_number)
+    )
+    for group_id, name in names:
+        rosters[group_id]['weekly_name'] = name
+
+    # Every student of the program, with this week's active membership if any
+    rows = session.execute(
+        db.select(Student, Membership)
+        .outerjoin(Membership, db.and_(
+            Membership.student_id == Student.id,
+            Membership.week_number == week_number,
+            Membership.is_active == True,
+            Membership.group_id.in_(program_groups),
+        ))
+        .where(Student.program_id == program_id)
+        .order_by(Membership.id, Student.name)
+    ).all()
+    unassigned = []
+    for student, membership in rows:
+        if membership is None:
+            unassigned.append(student)
+        else:
+            set_committed_value(membership, 'student', student)  # no lazy load per member
+            rosters[membership.group_id]['members'].append(membership)
+
+    instructors = session.execute(
+        db.select(WeeklyInstructorAssignment.group_id, User.id, User.username)
+        .join(User, User.id == WeeklyInstructorAssignment.instructor_id)
+        .where(WeeklyInstructorAssignment.group_id.in_(program_groups),
+               WeeklyInstructorAssignment.week_number == week_number)
+    )
+    for group_id, user_id, username in instructors:
+        rosters[group_id].update(instructor_id=user_id, instructor=username)
+    return rosters, unassigned
+
+
+def _bucket_constraints(rules, students, group_names):
+    """Engine ``Constraints`` for one bucket from program rules (by student id and group name)."""
+    if not rules:
+        return None
+    pos = {st.id: i for i, st in enumerate(students)}
+    slot = {name: g for g, name in enumerate(group_names)}
+
+    def pairs(kind):
+        return [(pos[a], pos[b], hard) for a, b, hard in rules[kind] if a in pos and b in pos]
+
+    pins = {pos[sid]: slot[name] for sid, name in rules['pins'].items() if sid in pos and name in slot}
+    return Constraints(pairs('together'), pairs('apart'), pins)
+
+
+def place_constrained(new_students, members, groups, rules, max_group_size=8, today=None):
+    """Place the new students that have grouping rules among a week's existing groups.
+
+    Existing members are pinned to their current group, so the engine sees
+    each group's real size and age band and keeps hard rules with partners
+    already placed; pins, together and apart rules then apply as in
+    ``plan_weekly_groups``. New students without rules are left to
+    ``place_students``.
+
+    Args:
+        new_students: Rows with ``id`` and ``birth_date``, all of one ability
+        members: The groups' active members this week, rows with ``id``, ``group_id`` and ``birth_date``
+        groups: Rows with ``id``, ``name`` and ``max_size``
+        rules (dict): Output of ``load_constraints``
+
+    Returns:
+        dict: student id -> group index (-1 if the hard rules left no group)
+    """
+    today = today or date.today()
+    names = [g.name for g in groups]
+    group_names = {g.id: g.name for g in groups}
+    # A member's current group overrides their pin; members are never moved
+    pins = dict(rules['pins'])
+    pins.update({m.id: group_names[m.group_id] for m in members})
+    rules = dict(rules, pins=pins)
+
+    constraints = _bucket_constraints(rules, list(members) + list(new_students), names)
+    bound = {k for i, j, _ in constraints.together + constraints.apart for k in (i, j)} | set(constraints.pins)
+    ruled = [st for i, st in enumerate(new_students, len(members)) if i in bound]
+    if not ruled:
+        return {}
+
+    bucket = list(members) + ruled
+    slots = assign_groups([_age(st.birth_date, today) for st in bucket],
+                          [g.max_size or max_group_size for g in groups], 'snake', None,
+                          _bucket_constraints(rules, bucket, names))
+    return {st.id: int(slot) for st, slot in zip(ruled, slots[len(members):])}
+
+
+def parse_age_bands(value):
+    """Age band cut points (years) from a list or a comma-separated string, e.g. '8, 11'.
+
+    Returns:
+        tuple: Sorted, distinct cut points; empty for no bands
+    """
+    if value is None:
+        return ()
+    parts = value.split(',') if isinstance(value, str) else value
+    try:
+        bands = sorted({float(p) for p in parts if str(p).strip()})
+    except (TypeError, ValueError):
+        raise ValueError("Age bands must be ages in years, e.g. '8, 11'")
+    if any(b <= 0 for b in bands):
+        raise ValueError("Age bands must be positive ages in years")
+    return tuple(bands)
+
+
+def plan_weekly_groups(program_id, week_number, students, existing_groups=(), max_group_size=8,
+                       algorithm='snake', time_budget=None, age_bands=(), constraints=None):
+    """Plan one week's groups and memberships from plain rows, without touching the database.
+
+    Students are bucketed by ``norm_ability`` and sorted oldest first; each
+    bucket reuses that ability's existing groups by index (in the given
+    order) and creates the rest, then the grouping engine places students.
+    With ``age_bands`` each ability is first split at those ages, so no
+    group mixes bands; group numbers run on across the bands, oldest first.
+    ``constraints`` (see ``load_constraints``) apply within each bucket;
+    when hard rules leave a student without a group, the bucket gets another
+    group and is placed again. Students still left out have no membership
+    (callers report ``len(students) - len(memberships)`` as unplaced).
+
+    Args:
+        students: Rows with ``id``, ``ability_level`` and ``birth_date``
+        existing_groups: Rows with ``id``, ``name``, ``ability_level`` and ``max_size``, in name order
+        age_bands: Cut points in years (see ``parse_age_bands``)
+        constraints (dict): Together / apart / pin rules from ``load_constraints``
+
+    Returns:
+        tuple: (new group rows, membership rows) as dicts ready for bulk INSERT
+    """
+    existing = defaultdict(list)
+    for row in existing_groups:
+        existing[row.ability_level].append(row)
+
+    # Group students by normalized ability, sort by age (birth_date oldest to youngest)
+    ability_groups = defaultdict(list)
+    for s in students:
+        ability = norm_ability(s.ability_level or '')
+        ability_groups[ability].append(s)
+    for ability in ability_groups:
+        # Sort by birth_date ascending (older first) to form balanced groups by age
+        ability_groups[ability].sort(key=lambda s: (s.birth_date or date.min))
+
+    now = datetime.utcnow()
+    today = date.today()
+    new_groups = []
+    new_memberships = []
+    # Iterate abilities in a deterministic order
+    for ability_level in sorted(ability_groups.keys()):
+        reusable = existing.get(ability_level, [])
+        index = 0
+        for band_students, ages in _split_age_bands(ability_groups[ability_level], age_bands, today):
+            num_groups = math.ceil(len(band_students) / max_group_size) if max_group_size > 0 else 0
+
+            # Reuse existing groups for this ability by index, create the rest
+            groups_for_band = []
+            names = []
+            capacities = {}
+
+            def add_group():
+                nonlocal index
+                if index < len(reusable):
+                    group_id, size, name = reusable[index].id, reusable[index].max_size, reusable[index].name
+                else:
+                    group_id, size, name = str(uuid4()), max_group_size, f"{ability_level} Group {index + 1}"
+                    new_groups.append({
+                        'id': group_id,
+                        'name': name,
+                        'program_id': program_id,
+                        'ability_level': ability_level,
+                        'max_size': max_group_size,
+                        'created_at': now,
+                    })
+                groups_for_band.append(group_id)
+                names.append(name)
+                capacities[group_id] = size or max_group_size
+                index += 1
+
+            for _ in range(num_groups):
+                add_group()
+            while True:
+                slots = assign_groups(ages, [capacities[g] for g in groups_for_band], algorithm, time_budget,
+                                      _bucket_constraints(constraints, band_students, names))
+                # Hard apart rules (or pins filling a group) can need more groups than the head count
+                if (slots >= 0).all() or not num_groups or len(groups_for_band) >= len(band_students):
+                    break
+                add_group()
+            for st, slot in zip(band_students, slots):
+                if slot < 0:
+                    continue
+                new_memberships.append({
+                    'student_id': st.id,
+                    'group_id': groups_for_band[slot],
+                    'week_number': week_number,
+                    'is_active': True,
+                    'joined_at': now,
+                })
+    return new_groups, new_memberships
+
+
+def _age(birth_date, today):
+    return (today - birth_date).days / 365.25 if birth_date else float('nan')
+
+
+def _split_age_bands(students, age_bands, today):
+    """Yield ``(students, ages)`` per age band, oldest band first, keeping the given order.
+
+    Students without a birth date go with the oldest band (they sort first).
+    """
+    ages = [_age(st.birth_date, today) for st in students]
+    if not age_bands:
+        yield students, ages
+        return
+    bands = defaultdict(list)
+    for st, age in zip(students, ages):
+        bands[bisect_right(age_bands, age) if age == age else len(age_bands)].append((st, age))
+    for band in sorted(bands, reverse=True):
+        members = bands[band]
+        yield [st for st, _ in members], [age for _, age in members]
+
+
+def summarize_plan(students, new_groups, memberships, today=None, constraints=None):
+    """Rosters and quality metrics for a plan from ``plan_weekly_groups`` (JSON-ready).
+
+    Metrics: group count, placed/unplaced students, group sizes, the age
+    spread (oldest minus youngest, in years) within groups and, given
+    ``constraints``, how many together / apart / pin rules the plan breaks.
+    Together rules between students of different abilities cannot be met
+    and are not counted.
+    """
+    today = today or date.today()
+    by_id = {st.id: st for st in students}
+    rosters = {g['id']: {'id': g['id'], 'name': g['name'], 'ability_level': g['ability_level'],
+                         'max_size': g['max_size'], 'students': []}
+               for g in new_groups}
+    for m in memberships:
+        st = by_id[m['student_id']]
+        age = _age(st.birth_date, today)
+        rosters[m['group_id']]['students'].append({
+            'id': st.id,
+            'name': st.name,
+            'age': round(age, 1) if age == age else None,
+        })
+
+    sizes, spreads = [], []
+    for roster in rosters.values():
+        ages = [s['age'] for s in roster['students'] if s['age'] is not None]
+        roster['size'] = len(roster['students'])
+        roster['age_spread'] = round(max(ages) - min(ages), 1) if ages else 0.0
+        sizes.append(roster['size'])
+        spreads.append(roster['age_spread'])
+
+    metrics = {
+        'groups': len(rosters),
+        'placed': len(memberships),
+        'unplaced': len(students) - len(memberships),
+        'min_size': min(sizes, default=0),
+        'max_size': max(sizes, default=0),
+        'mean_size': round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+        'mean_age_spread': round(sum(spreads) / len(spreads), 2) if spreads else 0.0,
+        'max_age_spread': max(spreads, default=0.0),
+    }
+    if constraints is not None:
+        group_of = {m['student_id']: m['group_id'] for m in memberships}
+        name_of = {g['id']: g['name'] for g in new_groups}
+        placed = lambda a, b: a in group_of and b in group_of
+        same_ability = lambda a, b: (norm_ability(by_id[a].ability_level or '')
+                                     == norm_ability(by_id[b].ability_level or ''))
+        metrics['together_broken'] = sum(1 for a, b, _ in constraints['together']
+                                         if placed(a, b) and group_of[a] != group_of[b] and same_ability(a, b))
+        metrics['apart_broken'] = sum(1 for a, b, _ in constraints['apart']
+                                      if placed(a, b) and group_of[a] == group_of[b])
+        metrics['pins_broken'] = sum(1 for sid, name in constraints['pins'].items()
+                                     if sid in group_of and name_of.get(group_of[sid]) != name)
+    return list(rosters.values()), metrics
+
+
+def write_season(session, program_id, weeks, new_groups, memberships):
+    """Replace a program's groups with a planned week 1 and copy it to weeks 2..``weeks``.
+
+    Deletes the program's memberships, per-week names and instructor
+    assignments and groups, inserts the planned rows, then copies each week
+    into the next with INSERT ... SELECT. Does not commit.
+    """
+    program_groups = db.select(Group.id).where(Group.program_id == program_id)
+    for model in (Membership, WeeklyGroupName, WeeklyInstructorAssignment):
+        session.execute(
+            db.delete(model).where(model.group_id.in_(program_groups)).execution_options(synchronize_session=False)
+        )
+    session.execute(
+        db.delete(Group).where(Group.program_id == program_id).execution_options(synchronize_session=False)
+    )
+    if new_groups:
+        session.execute(Group.__table__.insert(), new_groups)
+    if memberships:
+        session.execute(Membership.__table__.insert(), memberships)
+
+    now = datetime.utcnow()
+    columns = ['student_id', 'group_id', 'week_number', 'is_active', 'joined_at']
+    for week in range(2, weeks + 1):
+        previous = (
+            db.select(Membership.student_id, Membership.group_id, db.literal(week), db.true(), db.literal(now))
+            .join(Group, Group.id == Membership.group_id)
+            .where(Group.program_id == program_id,
+                   Membership.week_number == week - 1,
+                   Membership.is_active == True)
+        )
+        session.execute(Membership.__table__.insert().from_select(columns, previous))
+
 
 class SnowsportsManager:
     """Manages the core functionality for snowsports program management."""
@@ -19,7 +439,13 @@ class SnowsportsManager:
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in self.allowed_extensions
 
-    def create_groups_weekly(self, program_id, week_number, max_group_size=8):
+    @staticmethod
+    def _family_mode():
+        """How ParentID / OrderID families are grouped (GROUPING_FAMILY_CONSTRAINTS)."""
+        return current_app.config.get('GROUPING_FAMILY_CONSTRAINTS', 'soft')
+
+    def create_groups_weekly(self, program_id, week_number, max_group_size=8, algorithm='snake', time_budget=None,
+                             age_bands=()):
         """Create groups for a specific week and assign weekly memberships.
 
         Rules:
@@ -27,11 +453,30 @@ class SnowsportsManager:
         - Group students by ability; within each ability, sort by age (birth_date)
         - Create descriptive group names including ability code
         - Handle unclassified students in a 'MIXED' bucket
+        - Place each ability's students with the grouping engine ('snake' is the
+          classic balanced deal; 'optimize' searches for tighter age bands)
+        - Respect together / apart / pin constraints; families sharing a
+          ParentID or OrderID stay together (see ``load_constraints``)
+
+        Works set-wise: students and existing groups are loaded once, groups
+        are matched or created in memory (``plan_weekly_groups``), and new
+        groups and memberships are written with one bulk INSERT per table.
+
+        Args:
+            algorithm (str): Grouping engine algorithm (see ``grouping_engine.ALGORITHMS``)
+            time_budget (float): Seconds per ability bucket for 'optimize'
+            age_bands: Ages (years) at which to split each ability (see ``parse_age_bands``)
+
+        Returns:
+            tuple: (groups_created (int), unplaced (int)) - unplaced students
+            had no group their hard rules allow
         """
-        program = Program.query.get(program_id)
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown grouping algorithm: {algorithm}")
+        program = db.session.get(Program, program_id)
         if not program:
             raise ValueError("Program not found")
-        students = Student.query.filter_by(program_id=program_id).all()
+        students = load_students(db.session, program_id)
         if not students:
             raise ValueError("No students found in program")
 
@@ -43,120 +488,307 @@ class SnowsportsManager:
             )
         ).delete(synchronize_session=False)
 
-        # If week 1, reset groups
+        # If week 1, reset groups; later weeks reuse existing groups per ability, in name order
+        existing = []
         if week_number == 1:
             # Remove memberships (already cleared for week 1 above), then groups
             Group.query.filter_by(program_id=program_id).delete()
-            db.session.flush()
-
-        # Ability normalization map
-        def norm_ability(val: str) -> str:
-            v = (val or '').strip().upper()
-            aliases = {
-                'FT': {'FT', 'FIRST TIMER', 'FIRST-TIMER', 'BEGINNER0', 'B0'},
-                'BZ1': {'BZ1', 'BEGINNER1', 'B1', 'BEGINNER 1'},
-                'BZ2': {'BZ2', 'BEGINNER2', 'B2', 'BEGINNER 2'},
-                'IZ': {'IZ', 'INTERMEDIATE', 'INT', 'I'},
-                'AZ': {'AZ', 'ADVANCED', 'ADV', 'A'},
-            }
-            for key, vals in aliases.items():
-                if v in vals:
-                    return key
-            # If matches base keys already
-            if v in aliases.keys():
-                return v
-            # Fallbacks for common product description dumps
-            if v.startswith('BZ') and len(v) == 3 and v[2].isdigit():
-                return v  # e.g., BZ1/BZ2
-            if v in {'', 'UNKNOWN', 'N/A', 'NA', 'NONE'}:
-                return 'MIXED'
-            return v  # keep as-is but bucketed separately
-
-        # Group students by normalized ability, sort by age (birth_date oldest to youngest)
-        from collections import defaultdict
-        ability_groups = defaultdict(list)
-        for s in students:
-            ability = norm_ability(getattr(s, 'ability_level', '') or '')
-            ability_groups[ability].append(s)
-        for ability in ability_groups:
-            # Sort by birth_date ascending (older first) to form balanced groups by age
-            ability_groups[ability].sort(key=lambda s: (s.birth_date or datetime.min))
-
-        import math
-        groups_created = 0
-        # Iterate abilities in a deterministic order
-        for ability_level in sorted(ability_groups.keys()):
-            ability_students = ability_groups[ability_level]
-            num_groups = math.ceil(len(ability_students) / max_group_size) if max_group_size > 0 else 0
-
-            # Pre-create or reuse groups for this ability
-            groups_for_ability = []
-            for i in range(num_groups):
-                if week_number == 1:
-                    group = Group(
-                        id=str(uuid4()),
-                        name=f"{ability_level} Group {i + 1}",
-                        program_id=program_id,
-                        ability_level=ability_level,
-                        max_size=max_group_size,
-                    )
-                    db.session.add(group)
-                    db.session.flush()
-                    groups_created += 1
-                else:
-                    # Reuse existing group for this ability/index if possible
-                    group = Group.query.filter_by(program_id=program_id, ability_level=ability_level).order_by(Group.name).offset(i).first()
-                    if not group:
-                        group = Group(
-                            id=str(uuid4()),
-                            name=f"{ability_level} Group {i + 1}",
-                            program_id=program_id,
-                            ability_level=ability_level,
-                            max_size=max_group_size,
-                        )
-                        db.session.add(group)
-                        db.session.flush()
-                        groups_created += 1
-                groups_for_ability.append(group)
-
-            # Balanced distribution: snake ordering then round-robin to groups
-            # Create a snake sequence (oldest, youngest, 2nd oldest, 2nd youngest, ...)
-            snake_order = []
-            left, right = 0, len(ability_students) - 1
-            toggle = True
-            while left <= right:
-                if toggle:
-                    snake_order.append(ability_students[left])
-                    left += 1
-                else:
-                    snake_order.append(ability_students[right])
-                    right -= 1
-                toggle = not toggle
-
-            # Assign round-robin to groups respecting capacity
-            gi = 0
-            capacities = {g.id: g.max_size or max_group_size for g in groups_for_ability}
-            for st in snake_order:
-                placed = False
-                attempts = 0
-                while not placed and attempts < max(1, len(groups_for_ability)):
-                    g = groups_for_ability[gi % len(groups_for_ability)]
-                    if capacities[g.id] > 0:
-                        db.session.add(Membership(
-                            student_id=st.id,
-                            group_id=g.id,
-                            week_number=week_number,
-                            is_active=True,
-                            joined_at=datetime.utcnow()
-                        ))
-                        capacities[g.id] -= 1
-                        placed = True
-                    gi += 1
-                    attempts += 1
+        else:
+            existing = db.session.execute(
+                db.select(Group.id, Group.name, Group.ability_level, Group.max_size)
+                .where(Group.program_id == program_id)
+                .order_by(Group.name)
+            ).all()
 
+        constraints = load_constraints(db.session, program_id, students, self._family_mode())
+        new_groups, new_memberships = plan_weekly_groups(
+            program_id, week_number, students, existing, max_group_size, algorithm, time_budget, age_bands,
+            constraints
+        )
+        if new_groups:
+            db.session.execute(Group.__table__.insert(), new_groups)
+        if new_memberships:
+            db.session.execute(Membership.__table__.insert(), new_memberships)
         db.session.commit()
-        return groups_created
-               
+        return len(new_groups), len(students) - len(new_memberships)
+
+    def generate_season(self, program_id, max_group_size=8, algorithm='snake', time_budget=None, age_bands=()):
+        """Build weeks 1..max_weeks of a program in one transaction.
+
+        All groups, memberships and per-week overlays (names, instructors) of
+        the program are replaced: week 1 is planned like ``create_groups_weekly``
+        and each later week copies the previous week's memberships with an
+        INSERT ... SELECT (see ``write_season``). Nothing is committed unless
+        every week succeeds.
+
+        Returns:
+            tuple: (groups_created (int), weeks (int), unplaced (int))
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown grouping algorithm: {algorithm}")
+        program = db.session.get(Program, program_id)
+        if not program:
+            raise ValueError("Program not found")
+        students = load_students(db.session, program_id)
+        if not students:
+            raise ValueError("No students found in program")
+        weeks = program.max_weeks or 6
+        constraints = load_constraints(db.session, program_id, students, self._family_mode())
+        new_groups, memberships = plan_weekly_groups(
+            program_id, 1, students, (), max_group_size, algorithm, time_budget, age_bands, constraints
+        )
+        try:
+            write_season(db.session, program_id, weeks, new_groups, memberships)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(new_groups), weeks, len(students) - len(memberships)
+
+    def preview_groups(self, program_id, candidates, time_budget=None):
+        """Plan fresh week-1 groups for several parameter sets without writing anything.
+
+        Students are loaded once; each candidate (``max_size``, ``algorithm``,
+        ``age_bands``) is planned in memory with ``plan_weekly_groups``, so
+        coordinators can compare layouts and then generate the chosen one.
+
+        Returns:
+            tuple: (student count, list of {params, metrics, groups} per candidate)
+
+        Raises:
+            ValueError: Unknown program, no students, or an invalid candidate
+        """
+        if not candidates:
+            raise ValueError("No candidate parameters given")
+        if len(candidates) > PREVIEW_MAX_CANDIDATES:
+            raise ValueError(f"At most {PREVIEW_MAX_CANDIDATES} candidates per preview")
+        params = []
+        for candidate in candidates:
+            algorithm = candidate.get('algorithm') or 'snake'
+            if algorithm not in ALGORITHMS:
+                raise ValueError(f"Unknown grouping algorithm: {algorithm}")
+            try:
+                max_size = int(candidate.get('max_size') or 8)
+            except (TypeError, ValueError):
+                raise ValueError("max_size must be a whole number")
+            if max_size < 1:
+                raise ValueError("max_size must be at least 1")
+            params.append({
+                'max_size': max_size,
+                'algorithm': algorithm,
+                'age_bands': list(parse_age_bands(candidate.get('age_bands'))),
+            })
+
+        if db.session.get(Program, program_id) is None:
+            raise ValueError("Program not found")
+        students = load_students(db.session, program_id)
+        if not students:
+            raise ValueError("No students found in program")
+
+        constraints = load_constraints(db.session, program_id, students, self._family_mode())
+        previews = []
+        for p in params:
+            new_groups, memberships = plan_weekly_groups(
+                program_id, 1, students, (), p['max_size'], p['algorithm'], time_budget, p['age_bands'],
+                constraints
+            )
+            groups, metrics = summarize_plan(students, new_groups, memberships, constraints=constraints)
+            previews.append({'params': p, 'metrics': metrics, 'groups': groups})
+        return len(students), previews
+
+    def add_constraint(self, program_id, kind, student_ids, group_name=None, hard=True, user_id=None):
+        """Store a grouping rule for the program's students.
+
+        'together' keeps every listed student with the first one; 'apart'
+        keeps every listed pair apart; 'pin' puts each listed student in the
+        group called ``group_name``.
+
+        Returns:
+            list[GroupingConstraint]: The rows created (committed)
+
+        Raises:
+            ValueError: Unknown kind, too few students, students outside the program or no group name
+        """
+        if kind not in GroupingConstraint.KINDS:
+            raise ValueError(f"Unknown constraint kind: {kind}")
+        student_ids = list(dict.fromkeys(str(s) for s in student_ids or () if s))
+        if len(student_ids) < (1 if kind == 'pin' else 2):
+            raise ValueError("Pick one student to pin" if kind == 'pin' else f"Pick at least two students to keep {kind}")
+        if kind == 'pin' and not group_name:
+            raise ValueError("A pin needs a group name")
+        found = set(db.session.execute(
+            db.select(Student.id).where(Student.program_id == program_id, Student.id.in_(student_ids))
+        ).scalars())
+        missing = [s for s in student_ids if s not in found]
+        if missing:
+            raise ValueError(f"Students not in this program: {', '.join(missing)}")
+
+        if kind == 'pin':
+            # A student has one pin; a new one replaces it
+            GroupingConstraint.query.filter(
+                GroupingConstraint.program_id == program_id,
+                GroupingConstraint.kind == 'pin',
+                GroupingConstraint.student_id.in_(student_ids),
+            ).delete(synchronize_session=False)
+            pairs = [(s, None) for s in student_ids]
+        elif kind == 'together':
+            pairs = [(student_ids[0], s) for s in student_ids[1:]]
+        else:
+            pairs = list(combinations(student_ids, 2))
+        rows = [
+            GroupingConstraint(program_id=program_id, kind=kind, student_id=a, other_student_id=b,
+                               group_name=group_name if kind == 'pin' else None, hard=bool(hard),
+                               created_by_id=user_id)
+            for a, b in pairs
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        return rows
+
+    def place_unassigned_weekly(self, program_id, week_number, max_group_size=8):
+        """Place students with no group this week into existing groups with room.
+
+        Students who already have a group are never moved. Each new student is
+        matched to groups of the same normalized ability. New students with
+        together / apart / pin rules (see ``load_constraints``) are placed
+        first, next to the bucket's existing members (see ``place_constrained``),
+        so hard rules hold as they do in full generation; the rest join the
+        group whose age band and size they fit best (see
+        ``grouping_engine.place_students``). Groups are summarized with one
+        aggregate query, and members are only loaded for abilities with rules,
+        so the work grows with the number of new students rather than the size
+        of the program.
+
+        Returns:
+            tuple: (placed (int), unplaced (int)) - unplaced students had no
+            same-ability group with free capacity, or none their hard rules allow
+
+        Raises:
+            ValueError: Unknown program, or the week has no groups yet (generate it first)
+        """
+        program = db.session.get(Program, program_id)
+        if not program:
+            raise ValueError("Program not found")
+
+        assigned = (
+            db.select(Membership.student_id)
+            .join(Group, Group.id == Membership.group_id)
+            .where(Group.program_id == program_id,
+                   Membership.week_number == week_number,
+                   Membership.is_active == True)
+        )
+        students = db.session.execute(
+            db.select(Student.id, Student.ability_level, Student.birth_date, Student.parent_id, Student.order_id)
+            .where(Student.program_id == program_id, Student.id.not_in(assigned))
+            .order_by(Student.birth_date, Student.id)
+        ).all()
+        if not students:
+            return 0, 0
+
+        groups = db.session.execute(
+            db.select(Group.id, Group.name, Group.ability_level, Group.max_size)
+            .where(Group.program_id == program_id)
+            .order_by(Group.name)
+        ).all()
+        stats = {
+            row.group_id: row
+            for row in db.session.execute(
+                db.select(
+                    Membership.group_id,
+                    db.func.min(Student.birth_date).label('oldest_birth'),
+                    db.func.max(Student.birth_date).label('youngest_birth'),
+                    db.func.count(Membership.id).label('size'),
+                )
+                .join(Student, Student.id == Membership.student_id)
+                .join(Group, Group.id == Membership.group_id)
+                .where(Group.program_id == program_id,
+                       Membership.week_number == week_number,
+                       Membership.is_active == True)
+                .group_by(Membership.group_id)
+            )
+        }
+        if not stats:
+            # Placing into empty groups would be a worse full generation
+            raise ValueError(f"Week {week_number} has no groups yet; generate the week's groups first")
+
+        # Rules of the new students; family defaults need only the students sharing their ids
+        family = self._family_mode()
+        relatives = []
+        parents = {st.parent_id for st in students if st.parent_id}
+        orders = {st.order_id for st in students if st.order_id}
+        if family != 'off' and (parents or orders):
+            relatives = db.session.execute(
+                db.select(Student.id, Student.parent_id, Student.order_id)
+                .where(Student.program_id == program_id,
+                       db.or_(Student.parent_id.in_(parents), Student.order_id.in_(orders)))
+            ).all()
+        rules = load_constraints(db.session, program_id, relatives, family)
+        new_ids = {st.id for st in students}
+        ruled_ids = {sid for sid in rules['pins'] if sid in new_ids}
+        for a, b, _ in rules['together'] + rules['apart']:
+            ruled_ids.update(sid for sid in (a, b) if sid in new_ids)
+
+        today = date.today()
+
+        def age(birth_date):
+            return _age(birth_date, today)
+
+        groups_by_ability = defaultdict(list)
+        for g in groups:
+            groups_by_ability[g.ability_level].append(g)
+        students_by_ability = defaultdict(list)
+        for st in students:
+            students_by_ability[norm_ability(st.ability_level or '')].append(st)
+
+        now = datetime.utcnow()
+        memberships = []
+        for ability_level, new_students in students_by_ability.items():
+            candidates = groups_by_ability.get(ability_level, [])
+            lo = [age(stats[g.id].youngest_birth) if g.id in stats else float('nan') for g in candidates]
+            hi = [age(stats[g.id].oldest_birth) if g.id in stats else float('nan') for g in candidates]
+            sizes = [stats[g.id].size if g.id in stats else 0 for g in candidates]
+            caps = [g.max_size or max_group_size for g in candidates]
+
+            placed = {}
+            if candidates and any(st.id in ruled_ids for st in new_students):
+                members = db.session.execute(
+                    db.select(Student.id, Membership.group_id, Student.birth_date)
+                    .join(Membership, Membership.student_id == Student.id)
+                    .where(Membership.group_id.in_([g.id for g in candidates]),
+                           Membership.week_number == week_number,
+                           Membership.is_active == True)
+                ).all()
+                placed = place_constrained(new_students, members, candidates, rules, max_group_size, today)
+                # The rest are placed around them
+                for st in new_students:
+                    g = placed.get(st.id, -1)
+                    if g < 0:
+                        continue
+                    sizes[g] += 1
+                    a = age(st.birth_date)
+                    if a == a:
+                        lo[g] = a if lo[g] != lo[g] else min(lo[g], a)
+                        hi[g] = a if hi[g] != hi[g] else max(hi[g], a)
+
+            rest = [st for st in new_students if st.id not in placed]
+            slots = place_students([age(st.birth_date) for st in rest], lo, hi, sizes, caps)
+            placed.update((st.id, slot) for st, slot in zip(rest, slots))
+            for st in new_students:
+                slot = placed[st.id]
+                if slot >= 0:
+                    memberships.append({
+                        'student_id': st.id,
+                        'group_id': candidates[slot].id,
+                        'week_number': week_number,
+                        'is_active': True,
+                        'joined_at': now,
+                    })
+
+        if memberships:
+            db.session.execute(Membership.__table__.insert(), memberships)
+        db.session.commit()
+        return len(memberships), len(students) - len(memberships)
+
     def create_groups(self, program_id, max_group_size=6, keep_existing=False):
         """
         Create groups for a program based on student ability levels and ages.
@@ -201,8 +833,7 @@ class SnowsportsManager:
             # First, normalize ability levels
             ability_groups = defaultdict(list)
             for student in students:
-                # Simple normalization - extract first word of ability_level
-                ability = (student.ability_level or 'Beginner').split()[0].lower()
+                ability = norm_ability(student.ability_level)
                 ability_groups[ability].append(student)
             
             # Sort each ability group by age (youngest first)
@@ -221,7 +852,7 @@ class SnowsportsManager:
                     group = Group(
                         id=str(uuid4()),
                         program_id=program_id,
-                        name=f"{ability.capitalize()} {group_count}",
+                        name=f"{ABILITY_LABELS.get(ability, ability.capitalize())} {group_count}",
                         max_size=max_group_size
                     )
                     db.session.add(group)
@@ -243,156 +874,192 @@ class SnowsportsManager:
             db.session.rollback()
             return False, f"Error creating groups: {str(e)}"
     
-    def process_file(self, filepath, program_id, duplicate_strategy='skip'):
+    def process_file(self, filepath, program_id, duplicate_strategy='skip', batch_size=None,
+                     chunk_size=None, job=None, use_cache=True, withdraw_missing=False):
         """
         Process an uploaded file containing student data.
+
+        CSV files are streamed in chunks; each chunk is normalized, written and
+        committed before the next is read, so memory and lock time stay bounded.
+        Chunks committed before an error are kept.
+
+        Re-uploading a file already applied to the program (same bytes and
+        strategy, roster unchanged since) returns the earlier result instead.
+
+        The 'sync' strategy treats the file as the program's full roster: once
+        the file is read it diffs each customer's last row against current
+        students by customer id and applies only inserts and changed fields
+        (see ``RosterSync``); the diff is stored on ``job.details``.
         
         Args:
             filepath (str): Path to the uploaded file
             program_id (str): ID of the program to associate students with
+            duplicate_strategy (str): 'skip' | 'update' | 'duplicate' | 'sync'
+            batch_size (int): Rows per bulk INSERT (defaults to IMPORT_BATCH_SIZE)
+            chunk_size (int): Rows per CSV chunk/commit (defaults to IMPORT_CHUNK_SIZE)
+            job (ImportJob): Optional job record updated with progress after each chunk
+            use_cache (bool): Short-circuit identical re-uploads (not for 'duplicate')
+            withdraw_missing (bool): With 'sync', withdraw students absent from the file
             
         Returns:
             tuple: (success (bool), message (str))
         """
+        processed = 0
+        created = 0
+        updated = 0
+        skipped = 0
         try:
-            # Read the file based on extension
-            if filepath.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(filepath)
-            else:  # CSV
-                df = pd.read_csv(filepath)
-                
-            # Standardize column names (case-insensitive) and normalize to snake_case
-            df.columns = (
-                df.columns
-                .str.strip()
-                .str.lower()
-                .str.replace(r"[^a-z0-9]+", "_", regex=True)
-                .str.strip("_")
-            )
-            
-            # Process each row in the file
-            processed = 0
-            created = 0
-            updated = 0
-            skipped = 0
-            for _, row in df.iterrows():
-                result = self._process_student(row, program_id, duplicate_strategy)
-                processed += 1
-                if result == 'created':
-                    created += 1
-                elif result == 'updated':
-                    updated += 1
-                elif result == 'skipped':
-                    skipped += 1
-                
-            db.session.commit()
-            return True, f"Processed {processed} rows • created {created}, updated {updated}, skipped {skipped}."
+            if job is not None:
+                job.status = 'running'
+                job.started_at = datetime.utcnow()
+                db.session.commit()
+
+            fingerprint = None
+            if use_cache and duplicate_strategy in CACHEABLE_STRATEGIES:
+                cache_key = f"{duplicate_strategy}+withdraw" if withdraw_missing else duplicate_strategy
+                fingerprint = file_fingerprint(filepath, program_id, cache_key)
+                previous = self._cached_import(fingerprint, program_id)
+                if previous is not None:
+                    message = f"File already imported with no roster changes since; nothing to do. Previous result: {previous.message}"
+                    if job is not None:
+                        job.fingerprint = fingerprint
+                        job.roster_signature = previous.roster_signature
+                        job.reused_job_id = previous.id
+                        job.status = 'succeeded'
+                        job.message = message
+                        job.finished_at = datetime.utcnow()
+                        db.session.commit()
+                    return True, message
+
+            writer = StudentWriter(batch_size or current_app.config.get('IMPORT_BATCH_SIZE'))
+            chunk_size = chunk_size or current_app.config.get('IMPORT_CHUNK_SIZE')
+            index = None
+            mapping = None
+            sync = None
+            for df in iter_frames(filepath, chunk_size):
+                # Standardize column names (case-insensitive) and normalize to snake_case
+                df = normalize_columns(df)
+
+                # Resolve column aliases once per file and extract all fields column-wise
+                if mapping is None:
+                    mapping = resolve_columns(df.columns)
+                frame = normalize_students(df, program_id, mapping)
+
+                # Resolve duplicates in memory instead of querying per row
+                if index is None:
+                    index = StudentIndex.load(program_id)
+                index.include_ids(candidate_ids(frame))
+                if duplicate_strategy == 'sync' and sync is None:
+                    sync = RosterSync(program_id, writer, index)
+
+                for student_data in frame.to_dict('records'):
+                    if sync is not None:
+                        result = sync.apply(student_data)
+                    else:
+                        result = self._process_student(student_data, program_id, duplicate_strategy, index=index, writer=writer)
+                    processed += 1
+                    if result == 'created':
+                        created += 1
+                    elif result == 'updated':
+                        updated += 1
+                    elif result == 'skipped':
+                        skipped += 1
+
+                writer.flush()
+                if job is not None:
+                    job.record_progress(processed, created, updated, skipped)
+                db.session.commit()
+
+            message = f"Processed {processed} rows • created {created}, updated {updated}, skipped {skipped}."
+            if sync is not None:
+                created, updated = sync.finish()
+                skipped = sync.diff['skipped']
+                if job is not None:
+                    job.record_progress(processed, created, updated, skipped)
+                db.session.commit()
+                if withdraw_missing:
+                    sync.withdraw_missing()
+                    db.session.commit()
+                message = sync.summary()
+            if job is not None:
+                if sync is not None:
+                    job.details = json.dumps(sync.diff)
+                if fingerprint:
+                    job.fingerprint = fingerprint
+                    job.roster_signature = roster_signature(program_id)
+                job.status = 'succeeded'
+                job.message = message
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            return True, message
             
         except Exception as e:
             db.session.rollback()
-            return False, f"Error processing file: {str(e)}"
+            message = f"Error processing file: {str(e)}"
+            if job is not None:
+                job.status = 'failed'
+                job.message = message
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            return False, message
     
-    def _process_student(self, data, program_id, duplicate_strategy='skip'):
-        """Process a single student's data.
+    def _cached_import(self, fingerprint, program_id):
+        """Return the latest successful job for ``fingerprint`` if the roster is unchanged since."""
+        previous = ImportJob.query.filter(
+            ImportJob.fingerprint == fingerprint,
+            ImportJob.status == 'succeeded',
+            ImportJob.roster_signature.isnot(None),
+            ImportJob.reused_job_id.is_(None),
+        ).order_by(ImportJob.finished_at.desc()).first()
+        if previous is None or previous.roster_signature != roster_signature(program_id):
+            return None
+        return previous
+
+    def _process_student(self, student_data, program_id, duplicate_strategy='skip', index=None, writer=None):
+        """Process a single student's normalized data (a row of ``normalize_students``).
         Returns one of: 'created' | 'updated' | 'skipped'
         duplicate_strategy: 'skip' | 'update' | 'duplicate'
+        index: StudentIndex used for dedup lookups (loaded for program_id if omitted)
+        writer: StudentWriter the row is staged on (written immediately if omitted)
         """
-        # Normalize alternative column names
-        def first_nonempty(*keys):
-            for k in keys:
-                v = data.get(k)
-                if v is not None and not (isinstance(v, float) and pd.isna(v)) and str(v).strip() != '':
-                    return v
-            return None
+        if index is None:
+            index = StudentIndex.load(program_id, [student_data.get('id'), student_data.get('customer_id')])
+        if writer is None:
+            writer = StudentWriter()
+            result = self._process_student(student_data, program_id, duplicate_strategy, index, writer)
+            writer.flush()
+            return result
 
-        # ID: prefer explicit id, else customer_id, else generate uuid
-        raw_id = first_nonempty('student_id', 'id')
-        # Accept various aliases for customer id
-        customer_id = first_nonempty('customer_id', 'customerid', 'customer_number', 'customer number', 'cust_id')
-        student_id = str(raw_id or customer_id or '')
-        if not student_id:
-            student_id = str(uuid4())
-
-        # Name: prefer full name, else compose from first/last; handle 'last, first'
-        name = first_nonempty('name', 'full_name', 'full name', 'customername')
-        if not name:
-            first = first_nonempty('first_name', 'first name', 'given_name') or ''
-            last = first_nonempty('last_name', 'last name', 'surname') or ''
-            name = f"{str(first).strip()} {str(last).strip()}".strip()
-        else:
-            # If in 'Last, First' format, flip it
-            if isinstance(name, str) and ',' in name:
-                parts = [p.strip() for p in name.split(',', 1)]
-                if len(parts) == 2:
-                    name = f"{parts[1]} {parts[0]}".strip()
-
-        # Ability: accept variations, infer from productdescription_1 if present
-        ability = first_nonempty('ability_level', 'ability', 'level', 'skill_level', 'productdescription_1') or ''
-
-        # Compose student_data
-        student_data = {
-            'id': student_id,
-            'customer_id': str(customer_id or ''),
-            'name': str(name or '').strip(),
-            'birth_date': self._parse_date(first_nonempty('birth_date', 'dob', 'date_of_birth')),
-            'ability_level': str(ability),
-            'parent_name': str(first_nonempty('parent_name', 'guardian', 'parent') or ''),
-            # Prefer textbox37 (actual email) over textbox71 (HOH/Guest flag)
-            'contact_email': str(first_nonempty('textbox37', 'contact_email', 'email', 'textbox71') or '').lower().strip(),
-            'emergency_contact': str(first_nonempty('emergency_contact', 'emergency contact', 'primaryemergencycontact') or ''),
-            'emergency_phone': str(first_nonempty('emergency_phone', 'emergency phone', 'emergency_phone_number', 'primaryemergencyphone') or ''),
-            'food_allergy': str(first_nonempty('food_allergy', 'allergy', 'allergies') or first_nonempty('foodallergy') or ''),
-            'medication': str(first_nonempty('medication', 'medications', 'drugallergy') or ''),
-            'special_condition': str(first_nonempty('special_condition', 'notes', 'special_needs') or first_nonempty('specialcondition') or ''),
-            'program_id': program_id
-        }
-
-        # Clean sentinel values for contact_email
-        if student_data['contact_email'] in {'hoh', 'guest'}:
-            student_data['contact_email'] = ''
-        
         # Determine lookup keys for deduplication
         # Priority: explicit ID (student_id) -> customer_id -> (name + birth_date) -> contact_email
-        existing = None
-        if student_data['id']:
-            existing = Student.query.get(student_data['id'])
-        if not existing and student_data.get('customer_id'):
-            existing = Student.query.filter_by(customer_id=student_data['customer_id']).first()
-        if not existing and student_data.get('name') and student_data.get('birth_date'):
-            existing = Student.query.filter_by(name=student_data['name'], birth_date=student_data['birth_date']).first()
-        if not existing and student_data.get('contact_email'):
-            existing = Student.query.filter_by(contact_email=student_data['contact_email']).first()
+        existing_id = index.find(student_data)
+
+        # Rows without an explicit id or customer id get a generated one
+        if not student_data['id']:
+            student_data['id'] = str(uuid4())
 
         # Apply duplicate strategy
-        if existing:
+        if existing_id:
             if duplicate_strategy == 'skip':
                 return 'skipped'
             elif duplicate_strategy == 'update':
-                for key, value in student_data.items():
-                    setattr(existing, key, value)
+                # Update in place, keeping the existing primary key so memberships stay attached
+                student_data['id'] = existing_id
+                index.discard(existing_id)
+                index.add(student_data)
+                writer.upsert(student_data)
                 return 'updated'
             else:  # 'duplicate'
                 # Force a new unique ID
                 student_data['id'] = str(uuid4())
-                student = Student(**student_data)
-                db.session.add(student)
+                index.add(student_data)
+                writer.insert(student_data)
                 return 'created'
         else:
-            student = Student(**student_data)
-            db.session.add(student)
+            index.add(student_data)
+            writer.insert(student_data)
             return 'created'
     
-    def _parse_date(self, date_str):
-        """Parse date string into a date object."""
-        if not date_str or pd.isna(date_str):
-            return None
-        if isinstance(date_str, (int, float)):
-            return datetime.fromordinal(datetime(1900, 1, 1).toordinal() + int(date_str) - 2)
-        try:
-            return pd.to_datetime(date_str).date()
-        except:
-            return None
-    
     def move_student(self, student_id, from_group_id, to_group_id, user_id, reason=None):
         """
         Move a student from one group to another.
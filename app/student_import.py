@@ -0,0 +1,481 @@
+"""
+Student import helpers - shared building blocks for SnowsportsManager.process_file.
+"""
+import hashlib
+from datetime import datetime
+
+import pandas as pd
+
+from abilities import normalize_series
+from report_reader import iter_report
+
+from .models import db, Student, Membership
+
+# Snake_case column aliases per Student field, in priority order
+STUDENT_COLUMN_ALIASES = {
+    'raw_id': ('student_id', 'id'),
+    'customer_id': ('customer_id', 'customerid', 'customer_number', 'cust_id'),
+    'name': ('name', 'full_name', 'customername'),
+    'first_name': ('first_name', 'given_name'),
+    'last_name': ('last_name', 'surname'),
+    'birth_date': ('birth_date', 'dob', 'date_of_birth', 'birthdate'),
+    'ability_level': ('ability_level', 'ability', 'level', 'skill_level', 'productdescription_1'),
+    'parent_name': ('parent_name', 'guardian', 'parent'),
+    # Prefer textbox37 (actual email) over textbox71 (HOH/Guest flag)
+    'contact_email': ('textbox37', 'contact_email', 'email', 'textbox71'),
+    'emergency_contact': ('emergency_contact', 'primaryemergencycontact'),
+    'emergency_phone': ('emergency_phone', 'emergency_phone_number', 'primaryemergencyphone'),
+    'food_allergy': ('food_allergy', 'allergy', 'allergies', 'foodallergy'),
+    'medication': ('medication', 'medications', 'drugallergy'),
+    'special_condition': ('special_condition', 'notes', 'special_needs', 'specialcondition'),
+    'parent_id': ('parent_id', 'parentid', 'hoh_id'),
+    'order_id': ('order_id', 'orderid', 'order_id_transaction_id'),
+}
+
+# Placeholder values the booking system writes into the email columns
+SENTINEL_EMAILS = {'hoh', 'guest'}
+
+# Birth date layouts seen in reports, tried before falling back to per-value parsing
+BIRTH_DATE_FORMATS = ('%d-%b-%y', '%Y-%m-%d', '%d/%m/%Y')
+
+# SQLite caps bound parameters per statement; keep IN (...) lists well below it
+IN_CLAUSE_BATCH = 500
+
+# Rows per multi-row INSERT when no batch size is configured
+DEFAULT_BATCH_SIZE = 500
+
+# Rows per CSV chunk (and per commit) when no chunk size is configured
+DEFAULT_CHUNK_SIZE = 5000
+
+# Strategies whose re-application to an unchanged roster is a no-op (safe to cache)
+CACHEABLE_STRATEGIES = {'skip', 'update', 'sync'}
+
+# Student columns written by imports
+STUDENT_FIELDS = (
+    'id', 'customer_id', 'name', 'birth_date', 'ability_level', 'parent_name',
+    'contact_email', 'emergency_contact', 'emergency_phone', 'food_allergy',
+    'medication', 'special_condition', 'parent_id', 'order_id', 'program_id',
+)
+
+
+class StudentIndex:
+    """In-memory dedup index over a program's students.
+
+    Built once per import so each row resolves duplicates with dictionary
+    lookups instead of up to four ``Student.query`` round trips. Lookup
+    priority matches the original per-row queries:
+    id -> customer_id -> (name, birth_date) -> contact_email.
+    Values are student ids; rows are loaded as plain tuples, not ORM objects.
+    """
+
+    KEY_COLUMNS = (Student.id, Student.customer_id, Student.name, Student.birth_date, Student.contact_email)
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_customer_id = {}
+        self.by_name_dob = {}
+        self.by_email = {}
+
+    @classmethod
+    def load(cls, program_id, candidate_ids=()):
+        """Load the program's students, plus any student owning one of ``candidate_ids``."""
+        index = cls()
+        rows = db.session.execute(db.select(*cls.KEY_COLUMNS).where(Student.program_id == program_id))
+        for row in rows.mappings():
+            index.add(row)
+        index.include_ids(candidate_ids)
+        return index
+
+    def include_ids(self, candidate_ids):
+        """Index students from other programs that own one of ``candidate_ids``.
+
+        Student ids are a global primary key, so ids present in the upload are
+        resolved across programs (batched queries) to avoid key clashes.
+        """
+        missing = [i for i in {str(c) for c in candidate_ids if c} if i not in self.by_id]
+        for start in range(0, len(missing), IN_CLAUSE_BATCH):
+            batch = missing[start:start + IN_CLAUSE_BATCH]
+            rows = db.session.execute(db.select(*self.KEY_COLUMNS).where(Student.id.in_(batch)))
+            for row in rows.mappings():
+                self.add(row)
+
+    @staticmethod
+    def _keys(data):
+        name_dob = (data['name'], data['birth_date']) if data.get('name') and data.get('birth_date') else None
+        return data.get('customer_id') or None, name_dob, data.get('contact_email') or None
+
+    def add(self, data):
+        """Register a student (any mapping with the key columns).
+
+        The first student seen for a key wins, as with ``.first()``.
+        """
+        sid = data['id']
+        customer_id, name_dob, email = self._keys(data)
+        self.by_id.setdefault(sid, (customer_id, name_dob, email))
+        if customer_id:
+            self.by_customer_id.setdefault(customer_id, sid)
+        if name_dob:
+            self.by_name_dob.setdefault(name_dob, sid)
+        if email:
+            self.by_email.setdefault(email, sid)
+
+    def discard(self, student_id):
+        """Drop the keys currently pointing at ``student_id`` (before its fields change)."""
+        keys = self.by_id.pop(student_id, None)
+        if not keys:
+            return
+        for mapping, key in zip((self.by_customer_id, self.by_name_dob, self.by_email), keys):
+            if key and mapping.get(key) == student_id:
+                del mapping[key]
+
+    def find(self, data):
+        """Return the id of the existing student matching ``data`` (a student_data dict), or None."""
+        existing = None
+        if data.get('id') and data['id'] in self.by_id:
+            existing = data['id']
+        if not existing and data.get('customer_id'):
+            existing = self.by_customer_id.get(data['customer_id'])
+        if not existing and data.get('name') and data.get('birth_date'):
+            existing = self.by_name_dob.get((data['name'], data['birth_date']))
+        if not existing and data.get('contact_email'):
+            existing = self.by_email.get(data['contact_email'])
+        return existing
+
+
+class StudentWriter:
+    """Buffers student rows and writes them with multi-row Core statements.
+
+    New students go out as ``INSERT ... ON CONFLICT DO NOTHING`` and updates as
+    ``INSERT ... ON CONFLICT (id) DO UPDATE`` on SQLite and PostgreSQL; other
+    dialects fall back to executemany INSERT/UPDATE. Rows are keyed by id, so a
+    student created and then updated within one batch is written once.
+    """
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.inserts = {}
+        self.upserts = {}
+
+    def insert(self, row):
+        """Stage a new student row."""
+        self.inserts[row['id']] = {k: row.get(k) for k in STUDENT_FIELDS}
+        self._maybe_flush()
+
+    def upsert(self, row):
+        """Stage a row that replaces the stored fields of an existing student."""
+        self.inserts.pop(row['id'], None)
+        self.upserts[row['id']] = {k: row.get(k) for k in STUDENT_FIELDS}
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self.inserts) + len(self.upserts) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all staged rows (the caller owns the transaction)."""
+        if self.inserts:
+            self._write(list(self.inserts.values()), update=False)
+            self.inserts = {}
+        if self.upserts:
+            self._write(list(self.upserts.values()), update=True)
+            self.upserts = {}
+
+    def _write(self, rows, update):
+        table = Student.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            return self._write_generic(rows, update)
+
+        stmt = insert(table).values(rows)
+        if update:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={col: stmt.excluded[col] for col in STUDENT_FIELDS if col != 'id'},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.id])
+        db.session.execute(stmt)
+
+    def _write_generic(self, rows, update):
+        table = Student.__table__
+        if update:
+            ids = [r['id'] for r in rows]
+            existing = set(db.session.execute(db.select(table.c.id).where(table.c.id.in_(ids))).scalars())
+            changed = [{f'b_{k}': v for k, v in r.items()} for r in rows if r['id'] in existing]
+            if changed:
+                db.session.execute(
+                    table.update().where(table.c.id == db.bindparam('b_id')).values(
+                        {col: db.bindparam(f'b_{col}') for col in STUDENT_FIELDS if col != 'id'}
+                    ),
+                    changed,
+                )
+            rows = [r for r in rows if r['id'] not in existing]
+        if rows:
+            db.session.execute(table.insert(), rows)
+
+
+class RosterSync:
+    """Applies a report to a program's roster as a delta keyed on customer id.
+
+    Rows are collapsed to one per customer (the last row wins) and compared
+    with the roster as stored before the sync, so an unchanged report writes
+    nothing. Only new customers are inserted and only changed fields are
+    rewritten; students absent from the report can optionally be withdrawn. Students that
+    stay keep their ids, so their group memberships survive the sync. The
+    resulting ``diff`` is JSON-serializable.
+    """
+
+    COMPARED_FIELDS = tuple(f for f in STUDENT_FIELDS if f not in ('id', 'program_id'))
+
+    def __init__(self, program_id, writer, index):
+        self.program_id = program_id
+        self.writer = writer
+        self.index = index
+        self.seen = set()
+        self.staged = {}
+        self.diff = {'inserted': [], 'updated': {}, 'withdrawn': [], 'unchanged': 0, 'skipped': 0}
+
+        columns = [getattr(Student, f) for f in STUDENT_FIELDS]
+        rows = db.session.execute(db.select(*columns).where(
+            Student.program_id == program_id,
+            Student.customer_id.isnot(None),
+            Student.customer_id != '',
+        ))
+        self.current = {row['customer_id']: dict(row) for row in rows.mappings()}
+
+    @staticmethod
+    def _jsonable(value):
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    def apply(self, record):
+        """Stage one normalized row; returns 'staged', or 'skipped' without a customer id.
+
+        Multi-product bookings list a customer on several rows; the last one
+        wins, and nothing is compared or written until ``finish``.
+        """
+        customer_id = record.get('customer_id')
+        if not customer_id:
+            self.diff['skipped'] += 1
+            return 'skipped'
+        self.seen.add(customer_id)
+        self.staged[customer_id] = record
+        return 'staged'
+
+    def finish(self):
+        """Stage inserts and changed fields for every customer in the report, once each.
+
+        Returns:
+            tuple: (inserted (int), updated (int))
+        """
+        for customer_id, record in self.staged.items():
+            stored = self.current.get(customer_id)
+            if stored is None:
+                # A new customer whose id belongs to a student elsewhere cannot be inserted
+                if record['id'] in self.index.by_id:
+                    self.diff['skipped'] += 1
+                    continue
+                self.current[customer_id] = dict(record)
+                self.index.add(record)
+                self.diff['inserted'].append(customer_id)
+                self.writer.insert(record)
+                continue
+
+            changes = {
+                field: [self._jsonable(stored.get(field)), self._jsonable(record.get(field))]
+                for field in self.COMPARED_FIELDS
+                if (stored.get(field) or None) != (record.get(field) or None)
+            }
+            if not changes:
+                self.diff['unchanged'] += 1
+                continue
+            stored.update({field: record.get(field) for field in changes})
+            self.writer.upsert(stored)
+            self.diff['updated'][customer_id] = changes
+        self.staged.clear()
+        self.writer.flush()
+        return len(self.diff['inserted']), len(self.diff['updated'])
+
+    def withdraw_missing(self):
+        """End active memberships of students absent from the report and detach them from the program."""
+        missing = {cid: row['id'] for cid, row in self.current.items() if cid not in self.seen}
+        ids = list(missing.values())
+        now = datetime.utcnow()
+        for start in range(0, len(ids), IN_CLAUSE_BATCH):
+            batch = ids[start:start + IN_CLAUSE_BATCH]
+            Membership.query.filter(Membership.student_id.in_(batch), Membership.is_active == True).update(
+                {Membership.is_active: False, Membership.left_at: now}, synchronize_session=False)
+            Student.query.filter(Student.id.in_(batch)).update(
+                {Student.program_id: None}, synchronize_session=False)
+        self.diff['withdrawn'] = sorted(missing)
+        return len(ids)
+
+    def summary(self):
+        d = self.diff
+        return (f"Synced roster • inserted {len(d['inserted'])}, updated {len(d['updated'])}, "
+                f"unchanged {d['unchanged']}, withdrawn {len(d['withdrawn'])}, skipped {d['skipped']}.")
+
+
+def file_fingerprint(filepath, program_id, duplicate_strategy):
+    """sha256 of the uploaded bytes together with the target program and strategy."""
+    digest = hashlib.sha256()
+    digest.update(f"{program_id}\0{duplicate_strategy}\0".encode())
+    with open(filepath, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def roster_signature(program_id):
+    """sha256 over the program's stored student rows, used to detect roster changes."""
+    digest = hashlib.sha256()
+    columns = [getattr(Student, f) for f in STUDENT_FIELDS]
+    rows = db.session.execute(db.select(*columns).where(Student.program_id == program_id).order_by(Student.id))
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+
+def iter_frames(filepath, chunk_size=None):
+    """Yield the upload as DataFrames of at most ``chunk_size`` rows.
+
+    CSV files and ``.xlsx`` workbooks (openpyxl read-only mode) are streamed,
+    so memory stays bounded by the chunk size; legacy ``.xls`` files are
+    still read whole, then yielded in chunks. Header detection and
+    grouped-report flattening come from ``report_reader``.
+    """
+    yield from iter_report(filepath, chunk_size or DEFAULT_CHUNK_SIZE)
+
+
+def candidate_ids(frame):
+    """Collect the id-like values present in a normalized student frame."""
+    ids = set(frame['id']) | set(frame['customer_id'])
+    ids.discard('')
+    return ids
+
+
+def normalize_columns(df):
+    """Standardize column names to snake_case, keeping the first of any duplicates."""
+    df.columns = (
+        df.columns
+        .astype(str)
+        .str.strip()
+        .str.lower()
+        .str.replace(r"[^a-z0-9]+", "_", regex=True)
+        .str.strip("_")
+    )
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def resolve_columns(columns):
+    """Map each Student field to the alias columns present in ``columns``.
+
+    Resolved once per file so rows never re-check alias names.
+    """
+    present = set(columns)
+    return {field: [c for c in aliases if c in present] for field, aliases in STUDENT_COLUMN_ALIASES.items()}
+
+
+def _coalesce(df, columns):
+    """First non-empty value across ``columns`` for every row (None when all are empty)."""
+    result = pd.Series(None, index=df.index, dtype=object)
+    for col in columns:
+        values = df[col].astype(object)
+        nonempty = values.notna() & (values.astype(str).str.strip() != '')
+        result = result.where(result.notna(), values.where(nonempty))
+    return result
+
+
+def _as_text(series):
+    """String-coerce a coalesced series, mapping missing values to ''."""
+    return series.where(series.notna(), '').astype(str)
+
+
+def _as_id(series):
+    """``_as_text`` for id columns: blank cells make pandas read ids as floats, so drop a '.0'."""
+    return _as_text(series).str.replace(r'\.0$', '', regex=True)
+
+
+def _parse_birth_dates(values):
+    """Vectorized birth date parsing; returns an object series of ``date`` or None."""
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+    # Excel serial day numbers (numbers from workbooks, digit strings from CSV text)
+    numeric = values.map(type).isin((int, float)) & values.notna()
+    numeric |= values.astype(str).str.fullmatch(r'\d{1,5}(?:\.\d+)?') & values.notna()
+    if numeric.any():
+        serials = pd.to_numeric(values[numeric], errors='coerce')
+        parsed[numeric] = pd.to_datetime(serials, unit='D', origin=datetime(1899, 12, 30), errors='coerce')
+
+    pending = values.notna() & ~numeric
+    for fmt in BIRTH_DATE_FORMATS:
+        if not pending.any():
+            break
+        attempt = pd.to_datetime(values[pending].astype(str).str.strip(), format=fmt, errors='coerce')
+        parsed[attempt.index] = parsed[attempt.index].fillna(attempt)
+        pending &= parsed.isna()
+    if pending.any():
+        parsed[pending] = pd.to_datetime(values[pending], format='mixed', errors='coerce')
+
+    dates = pd.Series(parsed.dt.date, index=values.index, dtype=object)
+    return dates.where(parsed.notna(), None)
+
+
+def normalize_students(df, program_id, mapping=None):
+    """Build the normalized student frame for ``df`` with column-wise operations.
+
+    Args:
+        df: Frame with snake_case columns (see ``normalize_columns``)
+        program_id (str): Program the students are imported into
+        mapping (dict): Output of ``resolve_columns``; resolved from ``df`` if omitted
+
+    Returns:
+        DataFrame with one column per Student field. ``id`` is '' when the row
+        carries no id or customer id; a uuid is assigned at insert time.
+    """
+    if mapping is None:
+        mapping = resolve_columns(df.columns)
+
+    def field(name):
+        return _coalesce(df, mapping[name])
+
+    customer_id = _as_id(field('customer_id'))
+    raw_id = _as_id(field('raw_id'))
+
+    # Name: prefer full name ('Last, First' is flipped), else compose from first/last
+    name = field('name')
+    composed = (_as_text(field('first_name')).str.strip() + ' ' + _as_text(field('last_name')).str.strip()).str.strip()
+    full = _as_text(name)
+    parts = full.str.split(',', n=1, expand=True)
+    if parts.shape[1] == 2:
+        flipped = (parts[1].str.strip() + ' ' + parts[0].str.strip()).str.strip()
+        full = full.where(parts[1].isna(), flipped)
+    name = full.where(name.notna(), composed).str.strip()
+
+    # Ability: canonical code (FT, BZ1, ...) where recognized, else the text as given
+    ability = _as_text(field('ability_level'))
+    ability = normalize_series(ability, default=ability)
+
+    email = _as_text(field('contact_email')).str.lower().str.strip()
+    email = email.where(~email.isin(SENTINEL_EMAILS), '')
+
+    return pd.DataFrame({
+        'id': raw_id.where(raw_id != '', customer_id),
+        'customer_id': customer_id,
+        'name': name,
+        'birth_date': _parse_birth_dates(field('birth_date')),
+        'ability_level': ability,
+        'parent_name': _as_text(field('parent_name')),
+        'contact_email': email,
+        'emergency_contact': _as_text(field('emergency_contact')),
+        'emergency_phone': _as_text(field('emergency_phone')),
+        'food_allergy': _as_text(field('food_allergy')),
+        'medication': _as_text(field('medication')),
+        'special_condition': _as_text(field('special_condition')),
+        'parent_id': _as_id(field('parent_id')),
+        'order_id': _as_id(field('order_id')),
+        'program_id': program_id,
+    }, index=df.index)
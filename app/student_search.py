@@ -0,0 +1,186 @@
+"""
+Student search - ranked lookups for the autocomplete over student name,
+parent name, contact email and emergency phone.
+
+SQLite keeps an FTS5 index (``student_search``) over the students table;
+triggers update it on every insert, update and delete, so imports (including
+bulk inserts) and edits stay searchable without extra code. Postgres uses a
+pg_trgm GIN index on the same fields, which the database maintains itself.
+Both are created along with the students table (``db.create_all``) or by
+migration f1a6c2d8b940. Other databases, and SQLite builds without FTS5,
+fall back to a LIKE scan.
+
+The FTS5 index refers to students by rowid, which SQLite may renumber during
+VACUUM; run ``flask rebuild-search-index`` afterwards.
+"""
+import re
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+
+from .models import db, Student
+
+SEARCH_MAX_RESULTS = 50
+_MAX_TERMS = 8
+
+# Ranking: bm25 with a name match outranking a parent, email or phone match
+_FTS_RANK = 'bm25(student_search, 10.0, 4.0, 2.0, 2.0)'
+
+_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS student_search USING fts5(
+        name, parent_name, contact_email, emergency_phone,
+        content='students', tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS students_search_insert AFTER INSERT ON students BEGIN
+        INSERT INTO student_search(rowid, name, parent_name, contact_email, emergency_phone)
+        VALUES (new.rowid, new.name, new.parent_name, new.contact_email, new.emergency_phone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS students_search_delete AFTER DELETE ON students BEGIN
+        INSERT INTO student_search(student_search, rowid, name, parent_name, contact_email, emergency_phone)
+        VALUES ('delete', old.rowid, old.name, old.parent_name, old.contact_email, old.emergency_phone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS students_search_update
+        AFTER UPDATE OF name, parent_name, contact_email, emergency_phone ON students BEGIN
+        INSERT INTO student_search(student_search, rowid, name, parent_name, contact_email, emergency_phone)
+        VALUES ('delete', old.rowid, old.name, old.parent_name, old.contact_email, old.emergency_phone);
+        INSERT INTO student_search(rowid, name, parent_name, contact_email, emergency_phone)
+        VALUES (new.rowid, new.name, new.parent_name, new.contact_email, new.emergency_phone);
+    END""",
+)
+
+# The trigram index is on this expression; queries must use it verbatim
+_PG_DOCUMENT = ("lower(coalesce(name, '') || ' ' || coalesce(parent_name, '') || ' ' || "
+                "coalesce(contact_email, '') || ' ' || coalesce(emergency_phone, ''))")
+
+_PG_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_students_search_trgm ON students USING gin (({_PG_DOCUMENT}) gin_trgm_ops)",
+)
+
+# Search backend per engine: 'fts5', 'trgm' or 'like'
+_backends = weakref.WeakKeyDictionary()
+
+
+def create_search_index(connection):
+    """Create the search index for ``connection``'s database, if it supports one.
+
+    On SQLite this also re-indexes every student (e.g. after VACUUM).
+
+    Returns:
+        bool: True if an index exists afterwards
+    """
+    _backends.pop(connection.engine, None)
+    dialect = connection.dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        return False
+    statements = _FTS_DDL if dialect == 'sqlite' else _PG_DDL
+    try:
+        # A savepoint, so a missing FTS5 module or pg_trgm permission leaves the transaction usable
+        with connection.begin_nested():
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+    except DBAPIError:
+        return False
+    if dialect == 'sqlite':
+        connection.exec_driver_sql("INSERT INTO student_search(student_search) VALUES ('rebuild')")
+    return True
+
+
+@event.listens_for(Student.__table__, 'after_create')
+def _create_with_students(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(Student.__table__, 'before_drop')
+def _drop_with_students(target, connection, **kw):
+    _backends.pop(connection.engine, None)
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("DROP TABLE IF EXISTS student_search")
+
+
+def search_backend(connection):
+    """'fts5', 'trgm' or 'like' for ``connection``'s database (detected once per engine)."""
+    engine = connection.engine
+    backend = _backends.get(engine)
+    if backend is None:
+        backend = 'like'
+        if connection.dialect.name == 'sqlite':
+            found = connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'student_search'"
+            ).first()
+            backend = 'fts5' if found else 'like'
+        elif connection.dialect.name == 'postgresql':
+            found = connection.exec_driver_sql(
+                "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_students_search_trgm'"
+            ).first()
+            backend = 'trgm' if found else 'like'
+        _backends[engine] = backend
+    return backend
+
+
+def search_terms(query):
+    """Words of a search box query, lower-cased; punctuation (e.g. '@', '.') separates words."""
+    return re.findall(r'[^\W_]+', (query or '').lower())[:_MAX_TERMS]
+
+
+def search_students(session, query, program_id=None, limit=20):
+    """Ids of the students best matching ``query``, best first.
+
+    Every word must match the start of a word in the name, parent name,
+    contact email or emergency phone (FTS5), or appear anywhere in them
+    (pg_trgm and the LIKE fallback). ``program_id`` limits the search to one
+    program.
+
+    Returns:
+        list: Student ids, at most ``limit`` (capped at SEARCH_MAX_RESULTS)
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    limit = max(1, min(int(limit), SEARCH_MAX_RESULTS))
+    connection = session.connection()
+    backend = search_backend(connection)
+    params = {'limit': limit, 'program_id': program_id}
+    program_filter = 'AND students.program_id = :program_id' if program_id else ''
+
+    if backend == 'fts5':
+        params['match'] = ' '.join(f'"{term}"*' for term in terms)
+        if program_id:
+            # Filter by program first, so only the program's matches are ranked
+            statement = db.text(f"""
+                SELECT students.id FROM student_search
+                JOIN students ON students.rowid = student_search.rowid
+                WHERE student_search MATCH :match AND students.program_id = :program_id
+                ORDER BY {_FTS_RANK}
+                LIMIT :limit""")
+        else:
+            # Rank inside the index, then fetch only the top rows
+            statement = db.text(f"""
+                SELECT students.id FROM (
+                    SELECT rowid, {_FTS_RANK} AS score FROM student_search
+                    WHERE student_search MATCH :match ORDER BY score LIMIT :limit
+                ) AS hits
+                JOIN students ON students.rowid = hits.rowid
+                ORDER BY hits.score""")
+    elif backend == 'trgm':
+        likes = []
+        for i, term in enumerate(terms):
+            params[f'term{i}'] = f'%{term}%'
+            likes.append(f"{_PG_DOCUMENT} LIKE :term{i}")
+        params['query'] = ' '.join(terms)
+        statement = db.text(f"""
+            SELECT students.id FROM students
+            WHERE {' AND '.join(likes)} {program_filter}
+            ORDER BY word_similarity(:query, {_PG_DOCUMENT}) DESC, students.name
+            LIMIT :limit""")
+    else:
+        conditions = [
+            db.or_(*(column.ilike(f'%{term}%') for column in (
+                Student.name, Student.parent_name, Student.contact_email, Student.emergency_phone)))
+            for term in terms
+        ]
+        if program_id:
+            conditions.append(Student.program_id == program_id)
+        statement = db.select(Student.id).where(*conditions).order_by(Student.name).limit(limit)
+        params = {}
+    return [student_id for (student_id,) in session.execute(statement, params)]
@@ -26,6 +26,16 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
     ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '500'))  # rows per bulk INSERT
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '5000'))  # CSV rows read and committed at a time
+    IMPORT_ASYNC = os.environ.get('IMPORT_ASYNC', 'true').lower() in ['true', 'on', '1']  # run uploads in background
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', '2'))  # import threads per web process
+
+    # Grouping engine settings
+    GROUPING_ALGORITHM = os.environ.get('GROUPING_ALGORITHM', 'snake')  # default for weekly generation
+    GROUPING_TIME_BUDGET = float(os.environ.get('GROUPING_TIME_BUDGET', '0.25'))  # seconds per ability for 'optimize'
+    REGENERATION_WORKERS = int(os.environ.get('REGENERATION_WORKERS', '0'))  # processes for bulk regeneration (0 = CPU count)
+    GROUPING_FAMILY_CONSTRAINTS = os.environ.get('GROUPING_FAMILY_CONSTRAINTS', 'soft')  # keep ParentID/OrderID families together: soft | hard | off
     
     # Session settings
     SESSION_TYPE = 'filesystem'
@@ -92,6 +102,7 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # In-memory SQLite for tests
     WTF_CSRF_ENABLED = False  # Disable CSRF for testing
     MAIL_SUPPRESS_SEND = True  # Don't send emails during testing
+    IMPORT_ASYNC = False  # Run imports inline so tests see the results
     SERVER_NAME = 'localhost:5000'  # Required for test client
     
 
@@ -1,23 +1,15 @@
-import pandas as pd
 import sys
 
+from report_reader import read_report
+
 def excel_to_csv(input_file, output_file=None):
     """Convert Excel file to CSV, handling various formats."""
     if output_file is None:
         output_file = input_file.replace('.xlsx', '.csv').replace('.xls', '.csv')
     
     try:
-        # Try reading with different parameters
-        try:
-            df = pd.read_excel(input_file, engine='openpyxl')
-        except:
-            df = pd.read_excel(input_file, engine='xlrd')
-        
-        # Try to find the first row with actual data
-        for i in range(min(10, len(df))):
-            if not df.iloc[i].isna().all():
-                df = pd.read_excel(input_file, skiprows=i)
-                break
+        # Read once; title rows above the detected header are skipped
+        df = read_report(input_file).frame
         
         # Save to CSV
         df.to_csv(output_file, index=False)
@@ -0,0 +1,531 @@
+"""
+Grouping engine - assigns the students of one ability bucket to groups.
+
+Shared by the web app's weekly generator and the legacy ``src`` stage-1
+export. Every algorithm takes the bucket's students (in the caller's sort
+order, with their ages in years) and the capacity of each group, and returns
+the group index for each student (-1 if no group had room).
+
+Algorithms:
+    snake    - snake order (oldest, youngest, 2nd oldest, ...) dealt round-robin;
+               the classic weekly behaviour
+    chunk    - consecutive slices of the caller's order; the classic stage-1 behaviour
+    optimize - balanced age-sorted start, then a local search (swaps and moves)
+               that minimizes within-group age spread plus group-size imbalance
+               until it stops improving or the time budget runs out
+
+Constraints (``Constraints``) keep students together, apart or pinned to a
+group. The algorithm's own layout is the starting point; constrained students
+are then placed greedily, and 'optimize' keeps searching with the constraint
+costs added.
+"""
+import time
+
+import numpy as np
+
+# Cost weights: years of age spread vs. squared deviation from the mean group size
+AGE_SPREAD_WEIGHT = 1.0
+SIZE_IMBALANCE_WEIGHT = 0.5
+
+DEFAULT_TIME_BUDGET = 0.25  # seconds per bucket for 'optimize'
+SEARCH_BATCH = 64  # candidate swaps/moves scored per step
+SEARCH_PATIENCE = 50  # steps without improvement before stopping early
+MIDPOINT_WEIGHT = 0.1  # incremental placement: prefer groups centred near the student's age
+
+# Soft constraints: cost of splitting a 'together' pair / sharing a group with an 'apart' pair
+TOGETHER_WEIGHT = 2.0
+APART_WEIGHT = 2.0
+BASE_GROUP_WEIGHT = 0.25  # constrained placement: prefer the group the algorithm chose
+
+
+def _capacities(capacities):
+    return np.maximum(np.asarray(capacities, dtype=int), 0)
+
+
+def assign_snake(ages, capacities):
+    """Snake order over the given order, dealt round-robin to groups with room."""
+    n = len(ages)
+    caps = _capacities(capacities).copy()
+    result = np.full(n, -1, dtype=int)
+    if not len(caps):
+        return result
+    order = []
+    left, right = 0, n - 1
+    toggle = True
+    while left <= right:
+        if toggle:
+            order.append(left)
+            left += 1
+        else:
+            order.append(right)
+            right -= 1
+        toggle = not toggle
+    gi = 0
+    for i in order:
+        for _ in range(len(caps)):
+            g = gi % len(caps)
+            gi += 1
+            if caps[g] > 0:
+                result[i] = g
+                caps[g] -= 1
+                break
+    return result
+
+
+def assign_chunk(ages, capacities):
+    """Fill groups in turn with consecutive students of the given order."""
+    caps = _capacities(capacities)
+    slots = np.repeat(np.arange(len(caps)), caps)
+    result = np.full(len(ages), -1, dtype=int)
+    placed = min(len(ages), len(slots))
+    result[:placed] = slots[:placed]
+    return result
+
+
+def balanced_sizes(n, capacities):
+    """Group sizes as even as possible for ``n`` students under ``capacities``."""
+    caps = _capacities(capacities)
+    sizes = np.zeros(len(caps), dtype=int)
+    remaining = min(n, int(caps.sum()))
+    while remaining:
+        room = np.flatnonzero(sizes < caps)
+        share = max(1, remaining // len(room))
+        for g in room:
+            add = min(share, caps[g] - sizes[g], remaining)
+            sizes[g] += add
+            remaining -= add
+            if not remaining:
+                break
+    return sizes
+
+
+def cost(ages, assignment, n_groups):
+    """Total cost of an assignment (vectorized over all groups).
+
+    Age spread is max - min age per group; imbalance is the squared deviation
+    of each group's size from the mean size. Unplaced students are ignored.
+    """
+    ages = _fill_ages(ages)
+    placed = assignment >= 0
+    groups, vals = assignment[placed], ages[placed]
+    hi = np.full(n_groups, -np.inf)
+    lo = np.full(n_groups, np.inf)
+    np.maximum.at(hi, groups, vals)
+    np.minimum.at(lo, groups, vals)
+    sizes = np.bincount(groups, minlength=n_groups)
+    spread = np.where(sizes > 0, hi - lo, 0.0)
+    target = placed.sum() / n_groups if n_groups else 0.0
+    return AGE_SPREAD_WEIGHT * spread.sum() + SIZE_IMBALANCE_WEIGHT * ((sizes - target) ** 2).sum()
+
+
+def _fill_ages(ages):
+    """Missing ages take the bucket median so they neither stretch nor anchor a group."""
+    ages = np.asarray(ages, dtype=float)
+    if np.isnan(ages).any():
+        fill = np.nanmedian(ages) if (~np.isnan(ages)).any() else 0.0
+        ages = np.where(np.isnan(ages), fill, ages)
+    return ages
+
+
+class _Search:
+    """Local search state: per-group extremes let a batch of moves be scored at once."""
+
+    def __init__(self, ages, assignment, caps, links=None):
+        self.ages = ages
+        self.assignment = assignment
+        self.caps = caps
+        self.links = links
+        self.k = len(caps)
+        self.members = [list(np.flatnonzero(assignment == g)) for g in range(self.k)]
+        self.sizes = np.array([len(m) for m in self.members], dtype=int)
+        self.target = self.sizes.sum() / self.k
+        # Two largest / two smallest ages per group (and who holds the extreme)
+        self.max1 = np.full(self.k, -np.inf)
+        self.max2 = np.full(self.k, -np.inf)
+        self.min1 = np.full(self.k, np.inf)
+        self.min2 = np.full(self.k, np.inf)
+        self.argmax = np.full(self.k, -1)
+        self.argmin = np.full(self.k, -1)
+        for g in range(self.k):
+            self._refresh(g)
+
+    def _refresh(self, g):
+        members = self.members[g]
+        if not members:
+            self.max1[g] = self.max2[g] = -np.inf
+            self.min1[g] = self.min2[g] = np.inf
+            self.argmax[g] = self.argmin[g] = -1
+            return
+        vals = self.ages[members]
+        order = np.argsort(vals, kind='stable')
+        self.argmin[g], self.argmax[g] = members[order[0]], members[order[-1]]
+        self.min1[g], self.max1[g] = vals[order[0]], vals[order[-1]]
+        self.min2[g] = vals[order[1]] if len(order) > 1 else np.inf
+        self.max2[g] = vals[order[-2]] if len(order) > 1 else -np.inf
+
+    def _spread_after(self, g, out_idx, in_age):
+        """Spread of groups ``g`` after removing ``out_idx`` (-1: none) and adding ``in_age`` (nan: none)."""
+        hi = np.where(out_idx == self.argmax[g], self.max2[g], self.max1[g])
+        lo = np.where(out_idx == self.argmin[g], self.min2[g], self.min1[g])
+        adding = ~np.isnan(in_age)
+        hi = np.where(adding, np.fmax(hi, in_age), hi)
+        lo = np.where(adding, np.fmin(lo, in_age), lo)
+        return np.where(np.isfinite(hi) & np.isfinite(lo), hi - lo, 0.0)
+
+    def _spread(self, g):
+        return np.where(self.sizes[g] > 0, self.max1[g] - self.min1[g], 0.0)
+
+    def _imbalance(self, sizes):
+        return (sizes - self.target) ** 2
+
+    def step(self, rng):
+        """Score a batch of random swaps and moves; apply the best if it lowers the cost."""
+        placed = np.flatnonzero(self.assignment >= 0)
+        if len(placed) < 2 or self.k < 2:
+            return False
+        i = rng.choice(placed, SEARCH_BATCH)
+        gi = self.assignment[i]
+
+        # Swaps: i <-> j in another group (sizes unchanged)
+        j = rng.choice(placed, SEARCH_BATCH)
+        gj = self.assignment[j]
+        nan = np.full(SEARCH_BATCH, np.nan)
+        swap_delta = AGE_SPREAD_WEIGHT * (
+            self._spread_after(gi, i, self.ages[j]) + self._spread_after(gj, j, self.ages[i])
+            - self._spread(gi) - self._spread(gj)
+        )
+        swap_delta = np.where(gi != gj, swap_delta, np.inf)
+        if self.links is not None:
+            swap_delta = swap_delta + self.links.swap_delta(i, gi, j, gj)
+
+        # Moves: i -> group h with spare capacity
+        h = rng.integers(0, self.k, SEARCH_BATCH)
+        move_delta = AGE_SPREAD_WEIGHT * (
+            self._spread_after(gi, i, nan) + self._spread_after(h, np.full(SEARCH_BATCH, -1), self.ages[i])
+            - self._spread(gi) - self._spread(h)
+        ) + SIZE_IMBALANCE_WEIGHT * (
+            self._imbalance(self.sizes[gi] - 1) + self._imbalance(self.sizes[h] + 1)
+            - self._imbalance(self.sizes[gi]) - self._imbalance(self.sizes[h])
+        )
+        move_delta = np.where((gi != h) & (self.sizes[h] < self.caps[h]), move_delta, np.inf)
+        if self.links is not None:
+            move_delta = move_delta + self.links.move_delta(i, gi, h)
+
+        best_swap, best_move = int(np.argmin(swap_delta)), int(np.argmin(move_delta))
+        if min(swap_delta[best_swap], move_delta[best_move]) >= -1e-9:
+            return False
+        if swap_delta[best_swap] <= move_delta[best_move]:
+            a, b = i[best_swap], j[best_swap]
+            ga, gb = gi[best_swap], gj[best_swap]
+            self.members[ga].remove(a)
+            self.members[gb].remove(b)
+            self.members[ga].append(b)
+            self.members[gb].append(a)
+            self.assignment[a], self.assignment[b] = gb, ga
+            self._refresh(ga)
+            self._refresh(gb)
+            if self.links is not None:
+                self.links.move(a, ga, gb)
+                self.links.move(b, gb, ga)
+        else:
+            a, ga, gb = i[best_move], gi[best_move], h[best_move]
+            self.members[ga].remove(a)
+            self.members[gb].append(a)
+            self.assignment[a] = gb
+            self.sizes[ga] -= 1
+            self.sizes[gb] += 1
+            self._refresh(ga)
+            self._refresh(gb)
+            if self.links is not None:
+                self.links.move(a, ga, gb)
+        return True
+
+
+def assign_optimize(ages, capacities, time_budget=DEFAULT_TIME_BUDGET, seed=0):
+    """Minimize age spread and size imbalance under capacities, within ``time_budget`` seconds."""
+    caps = _capacities(capacities)
+    n = len(ages)
+    result = np.full(n, -1, dtype=int)
+    if not n or not len(caps):
+        return result
+
+    filled = _fill_ages(ages)
+    return _local_search(filled, _optimize_start(filled, caps), caps, time_budget, seed)
+
+
+def _optimize_start(filled, caps):
+    """Age-sorted students in contiguous runs of balanced size (youngest first)."""
+    result = np.full(len(filled), -1, dtype=int)
+    order = np.argsort(filled, kind='stable')
+    sizes = balanced_sizes(len(filled), caps)
+    slots = np.repeat(np.arange(len(caps)), sizes)
+    result[order[:len(slots)]] = slots
+    return result
+
+
+def _local_search(filled, assignment, caps, time_budget, seed, links=None):
+    search = _Search(filled, assignment, caps, links)
+    rng = np.random.default_rng(seed)
+    deadline = time.perf_counter() + (time_budget or 0)
+    idle = 0
+    while idle < SEARCH_PATIENCE and time.perf_counter() < deadline:
+        idle = 0 if search.step(rng) else idle + 1
+    return search.assignment
+
+
+def place_students(ages, group_lo, group_hi, sizes, capacities):
+    """Place new students into existing groups without moving anyone already placed.
+
+    Groups are described by their youngest/oldest member age (NaN if unknown
+    or empty) and current size. Each student, in the given order, joins the
+    group with room whose cost rises least (age spread plus size imbalance,
+    nearest age midpoint breaking ties); that group's figures are updated
+    before the next student. Work is O(students x groups).
+
+    Returns:
+        numpy.ndarray: Group index per student, -1 if no group had room
+    """
+    lo = np.array(group_lo, dtype=float)
+    hi = np.array(group_hi, dtype=float)
+    sizes = np.array(sizes, dtype=int)
+    caps = _capacities(capacities)
+    ages = np.asarray(ages, dtype=float)
+    result = np.full(len(ages), -1, dtype=int)
+    if not len(caps):
+        return result
+    target = (sizes.sum() + len(ages)) / len(caps)
+    for n, age in enumerate(ages):
+        spread = np.nan_to_num(hi - lo)
+        new_lo, new_hi = np.fmin(lo, age), np.fmax(hi, age)
+        delta = (
+            AGE_SPREAD_WEIGHT * (np.nan_to_num(new_hi - new_lo) - spread)
+            + SIZE_IMBALANCE_WEIGHT * ((sizes + 1 - target) ** 2 - (sizes - target) ** 2)
+            + MIDPOINT_WEIGHT * np.nan_to_num(np.abs(age - (lo + hi) / 2))
+        )
+        delta = np.where(sizes < caps, delta, np.inf)
+        g = int(np.argmin(delta))
+        if not np.isfinite(delta[g]):
+            continue
+        result[n] = g
+        lo[g], hi[g] = new_lo[g], new_hi[g]
+        sizes[g] += 1
+    return result
+
+
+class Constraints:
+    """Together / apart / pin constraints over one bucket's students (by position).
+
+    Args:
+        together: ``(i, j, hard)`` pairs to keep in one group
+        apart: ``(i, j, hard)`` pairs to keep in different groups
+        pins: ``{i: group index}`` students that must be in that group
+
+    Hard 'together' pairs are merged into units that are placed whole; a
+    unit that would hold a hard 'apart' pair, or that is larger than the
+    biggest group, falls back to soft pairs. Soft pairs only add
+    TOGETHER_WEIGHT / APART_WEIGHT to the cost when broken.
+    """
+
+    def __init__(self, together=(), apart=(), pins=None):
+        self.together = [(int(i), int(j), bool(hard)) for i, j, hard in together if i != j]
+        self.apart = [(int(i), int(j), bool(hard)) for i, j, hard in apart if i != j]
+        self.pins = {int(i): int(g) for i, g in (pins or {}).items()}
+
+    def __bool__(self):
+        return bool(self.together or self.apart or self.pins)
+
+    def units(self, n, max_capacity):
+        """Hard 'together' units as index arrays (singletons included) and the pairs demoted to soft."""
+        parent = list(range(n))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for i, j, hard in self.together:
+            if hard:
+                parent[find(i)] = find(j)
+        members = {}
+        for i in range(n):
+            members.setdefault(find(i), []).append(i)
+        split = {root for root, m in members.items() if len(m) > max_capacity}
+        split |= {find(i) for i, j, hard in self.apart if hard and find(i) == find(j)}
+        units = []
+        for root, m in members.items():
+            if root in split:
+                units.extend([i] for i in m)
+            else:
+                units.append(m)
+        demoted = [(i, j) for i, j, hard in self.together if hard and find(i) in split]
+        return [np.array(u) for u in units], demoted
+
+
+class _Links:
+    """Pairwise constraint matrices plus per-group partner counts, for O(1) deltas per candidate.
+
+    Dense n x n matrices: fine for the hundreds of students of one ability
+    bucket, and only built when a bucket has constraints.
+    """
+
+    def __init__(self, n, k, constraints, demoted, fixed):
+        self.together = np.zeros((n, n))
+        self.apart = np.zeros((n, n))
+        self.hard_apart = np.zeros((n, n))
+        soft_together = [(i, j) for i, j, hard in constraints.together if not hard] + demoted
+        for i, j in soft_together:
+            self.together[i, j] = self.together[j, i] = TOGETHER_WEIGHT
+        for i, j, hard in constraints.apart:
+            if hard:
+                self.hard_apart[i, j] = self.hard_apart[j, i] = 1
+            else:
+                self.apart[i, j] = self.apart[j, i] = APART_WEIGHT
+        # Per student and group: weight of partners (or number of hard conflicts) in that group
+        self.together_in = np.zeros((n, k))
+        self.apart_in = np.zeros((n, k))
+        self.hard_in = np.zeros((n, k))
+        self.fixed = fixed  # pinned students and members of hard units never move alone
+
+    def place(self, members, g):
+        self.together_in[:, g] += self.together[:, members].sum(axis=1)
+        self.apart_in[:, g] += self.apart[:, members].sum(axis=1)
+        self.hard_in[:, g] += self.hard_apart[:, members].sum(axis=1)
+
+    def move(self, a, ga, gb):
+        for matrix, counts in ((self.together, self.together_in), (self.apart, self.apart_in),
+                               (self.hard_apart, self.hard_in)):
+            counts[:, ga] -= matrix[:, a]
+            counts[:, gb] += matrix[:, a]
+
+    def unit_delta(self, members, groups):
+        """Constraint cost change of placing ``members`` (unplaced) into each of ``groups``."""
+        delta = (self.apart_in[members][:, groups].sum(axis=0)
+                 - self.together_in[members][:, groups].sum(axis=0))
+        return np.where(self.hard_in[members][:, groups].sum(axis=0) > 0, np.inf, delta)
+
+    def move_delta(self, i, gi, h):
+        delta = (self.together_in[i, gi] - self.together_in[i, h]
+                 + self.apart_in[i, h] - self.apart_in[i, gi])
+        return np.where(self.fixed[i] | (self.hard_in[i, h] > 0), np.inf, delta)
+
+    def swap_delta(self, i, gi, j, gj):
+        # The pair (i, j) itself stays split / apart, so undo its counted change
+        delta = (self.together_in[i, gi] - self.together_in[i, gj] + self.apart_in[i, gj] - self.apart_in[i, gi]
+                 + self.together_in[j, gj] - self.together_in[j, gi] + self.apart_in[j, gi] - self.apart_in[j, gj]
+                 + 2 * self.together[i, j] - 2 * self.apart[i, j])
+        blocked = (self.fixed[i] | self.fixed[j]
+                   | (self.hard_in[i, gj] - self.hard_apart[i, j] > 0)
+                   | (self.hard_in[j, gi] - self.hard_apart[i, j] > 0))
+        return np.where(blocked, np.inf, delta)
+
+
+def assign_constrained(ages, capacities, constraints, algorithm='snake', time_budget=None, seed=0):
+    """Assign a bucket under ``constraints`` (see ``Constraints``).
+
+    The algorithm's unconstrained layout is kept for students without
+    constraints wherever their group has room. Pinned units, then other
+    constrained units, then everyone else are placed in turn, each into the
+    feasible group whose cost (age spread, size imbalance, broken soft pairs,
+    leaving the algorithm's group) rises least. 'optimize' then runs its
+    local search with the constraint costs added; pinned students and hard
+    units stay put. Hard rules are never broken: a student with no feasible
+    group is left unplaced (-1). Pins may overfill their group.
+    """
+    caps = _capacities(capacities)
+    n, k = len(ages), len(caps)
+    filled = _fill_ages(ages)
+    if algorithm == 'optimize':
+        base = _optimize_start(filled, caps) if n and k else np.full(n, -1, dtype=int)
+    else:
+        base = ALGORITHMS[algorithm](filled, caps)
+    if not n or not k or not constraints:
+        return base
+
+    units, demoted = constraints.units(n, int(caps.max()))
+    pins = {i: g for i, g in constraints.pins.items() if 0 <= g < k}
+    pinned_unit = {}
+    constrained = np.zeros(n, dtype=bool)
+    for i, j, _ in constraints.together + constraints.apart:
+        constrained[[i, j]] = True
+    fixed = np.zeros(n, dtype=bool)
+    for u, members in enumerate(units):
+        pin = next((pins[i] for i in members if i in pins), None)
+        if pin is not None:
+            pinned_unit[u] = pin
+        if pin is not None or len(members) > 1:
+            fixed[members] = True
+            constrained[members] = True
+    links = _Links(n, k, constraints, demoted, fixed)
+
+    # Pinned units, then constrained units, then the rest (caller order within each)
+    order = sorted(range(len(units)), key=lambda u: (
+        u not in pinned_unit, not constrained[units[u]].any(), units[u][0]))
+
+    result = np.full(n, -1, dtype=int)
+    sizes = np.zeros(k, dtype=int)
+    lo = np.full(k, np.nan)
+    hi = np.full(k, np.nan)
+    target = n / k
+    for u in order:
+        members = units[u]
+        preferred = np.bincount(base[members][base[members] >= 0], minlength=k).argmax() \
+            if (base[members] >= 0).any() else -1
+        if u in pinned_unit:
+            g = pinned_unit[u]
+        elif not constrained[members].any() and preferred >= 0 and sizes[preferred] < caps[preferred]:
+            g = preferred
+        else:
+            m_lo, m_hi = filled[members].min(), filled[members].max()
+            new_lo, new_hi = np.fmin(lo, m_lo), np.fmax(hi, m_hi)
+            size = len(members)
+            score = (
+                AGE_SPREAD_WEIGHT * (new_hi - new_lo - np.nan_to_num(hi - lo))
+                + SIZE_IMBALANCE_WEIGHT * ((sizes + size - target) ** 2 - (sizes - target) ** 2)
+                + BASE_GROUP_WEIGHT * (np.arange(k) != preferred)
+                + links.unit_delta(members, np.arange(k))
+            )
+            score = np.where(sizes + size <= caps, score, np.inf)
+            g = int(np.argmin(score))
+            if not np.isfinite(score[g]):
+                continue
+        result[members] = g
+        sizes[g] += len(members)
+        lo[g] = np.fmin(lo[g], filled[members].min())
+        hi[g] = np.fmax(hi[g], filled[members].max())
+        links.place(members, g)
+
+    if algorithm == 'optimize':
+        result = _local_search(filled, result, caps, DEFAULT_TIME_BUDGET if time_budget is None else time_budget,
+                               seed, links)
+    return result
+
+
+ALGORITHMS = {
+    'snake': assign_snake,
+    'chunk': assign_chunk,
+    'optimize': assign_optimize,
+}
+
+
+def assign_groups(ages, capacities, algorithm='snake', time_budget=None, constraints=None):
+    """Assign one ability bucket's students to groups.
+
+    Args:
+        ages: Age in years per student (NaN if unknown), in the caller's sort order
+        capacities: Maximum size of each group
+        algorithm (str): One of ``ALGORITHMS``
+        time_budget (float): Seconds allowed for 'optimize' (default DEFAULT_TIME_BUDGET)
+        constraints (Constraints): Together / apart / pin rules by student position
+
+    Returns:
+        numpy.ndarray: Group index per student, -1 if no group had room
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown grouping algorithm: {algorithm}")
+    ages = np.asarray(ages, dtype=float)
+    if constraints:
+        return assign_constrained(ages, capacities, constraints, algorithm, time_budget)
+    if algorithm == 'optimize':
+        return assign_optimize(ages, capacities, DEFAULT_TIME_BUDGET if time_budget is None else time_budget)
+    return ALGORITHMS[algorithm](ages, capacities)
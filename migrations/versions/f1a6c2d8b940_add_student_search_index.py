@@ -0,0 +1,57 @@
+"""Add student search index (SQLite FTS5 / Postgres pg_trgm)
+
+Revision ID: f1a6c2d8b940
+Revises: e5c9a3f1d284
+Create Date: 2026-10-17 17:05:44.916270
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a6c2d8b940'
+down_revision = 'e5c9a3f1d284'
+branch_labels = None
+depends_on = None
+
+PG_DOCUMENT = ("lower(coalesce(name, '') || ' ' || coalesce(parent_name, '') || ' ' || "
+               "coalesce(contact_email, '') || ' ' || coalesce(emergency_phone, ''))")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("""CREATE VIRTUAL TABLE student_search USING fts5(
+            name, parent_name, contact_email, emergency_phone,
+            content='students', tokenize='unicode61 remove_diacritics 2', prefix='2 3')""")
+        op.execute("""CREATE TRIGGER students_search_insert AFTER INSERT ON students BEGIN
+            INSERT INTO student_search(rowid, name, parent_name, contact_email, emergency_phone)
+            VALUES (new.rowid, new.name, new.parent_name, new.contact_email, new.emergency_phone);
+        END""")
+        op.execute("""CREATE TRIGGER students_search_delete AFTER DELETE ON students BEGIN
+            INSERT INTO student_search(student_search, rowid, name, parent_name, contact_email, emergency_phone)
+            VALUES ('delete', old.rowid, old.name, old.parent_name, old.contact_email, old.emergency_phone);
+        END""")
+        op.execute("""CREATE TRIGGER students_search_update
+            AFTER UPDATE OF name, parent_name, contact_email, emergency_phone ON students BEGIN
+            INSERT INTO student_search(student_search, rowid, name, parent_name, contact_email, emergency_phone)
+            VALUES ('delete', old.rowid, old.name, old.parent_name, old.contact_email, old.emergency_phone);
+            INSERT INTO student_search(rowid, name, parent_name, contact_email, emergency_phone)
+            VALUES (new.rowid, new.name, new.parent_name, new.contact_email, new.emergency_phone);
+        END""")
+        op.execute("INSERT INTO student_search(student_search) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(f"CREATE INDEX ix_students_search_trgm ON students USING gin (({PG_DOCUMENT}) gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS students_search_update")
+        op.execute("DROP TRIGGER IF EXISTS students_search_delete")
+        op.execute("DROP TRIGGER IF EXISTS students_search_insert")
+        op.execute("DROP TABLE IF EXISTS student_search")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_students_search_trgm")
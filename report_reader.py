@@ -0,0 +1,276 @@
+"""
+Report reader - shared loader for booking-system exports (CSV and Excel).
+
+Opens a report once, finds the header row and the report flavour from a
+signature of known columns, and returns a frame with the CXV/WPS column
+layout. Used by the web importer, the legacy ``src`` upload route and the
+command-line analysis scripts.
+
+Flavours:
+    cxv   - flat CSV export with ability-coded products ("... - FT")
+    wps   - same layout, school products ("Wanaka Primary - First Time Ski - Cardrona")
+    adam  - grouped Excel report: title rows, then location / program / pool date /
+            product section rows above each block of customers
+    generic - anything else; the first row with known columns (or the first
+            non-empty row) is used as the header
+"""
+import csv
+import io
+import re
+from itertools import chain, islice
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Known header cells per flavour; the best-scoring row within HEADER_SCAN_ROWS is the header
+FLAVOUR_SIGNATURES = {
+    'cxv': {'AuthorizationDescription', 'InventoryPoolLocation', 'Textbox20', 'InventoryDate',
+            'ProductDescription_1', 'CustomerID', 'CustomerName', 'BirthDate'},
+    'adam': {'Inventory Location / Pool', 'Customer IPCode', 'Customer Name', 'Customer DOB',
+             'HOH ID', 'HOH Name', 'Order ID / Transaction ID', 'Product Date'},
+}
+HEADER_SCAN_ROWS = 50
+
+# Grouped (Adam-style) Excel headers mapped onto the flat CXV/WPS column names
+ADAM_COLUMNS = {
+    'Customer IPCode': 'CustomerID',
+    'Customer Name': 'CustomerName',
+    'Guest/ HOH Email': 'Textbox71',
+    'Customer/HOH Email': 'Textbox37',
+    'Customer DOB': 'BirthDate',
+    'HOH ID': 'ParentID',
+    'HOH Name': 'ParentName',
+    'Order ID / Transaction ID': 'OrderID',
+    'Order Status': 'ReservationStatus',
+    'Valid (Y/N)': 'ROLInd',
+    'Primary Emergency Contact': 'PrimaryEmergencyContact',
+    'Primary Emergency Phone': 'PrimaryEmergencyPhone',
+    'Food Allergy': 'FoodAllergy',
+    'Drug Allergy': 'DrugAllergy',
+    'Medication': 'Medication',
+    'Special Condition': 'SpecialCondition',
+}
+
+# Cell values pandas' readers treat as missing by default (kept so streamed .xlsx matches read_excel)
+_NA_STRINGS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+# CSV cells are read as text: type inference would run per chunk, so a chunk of
+# all-numeric phones would lose leading zeros and a chunk with a blank id would
+# turn ids into floats ('1033691.0'). Missing-value strings match the .xlsx path.
+_CSV_OPTIONS = dict(dtype=str, keep_default_na=False, na_values=sorted(_NA_STRINGS), encoding='utf-8-sig')
+
+# Products in CXV-style reports end with an ability code, e.g. "... - FT" / "... - BZ2"
+_ABILITY_SUFFIX = re.compile(r'\s-\s[A-Z]{1,3}\d?$')
+
+
+@dataclass
+class Report:
+    """A parsed report frame plus what was detected about it."""
+    frame: pd.DataFrame
+    flavour: str
+    header_row: int
+
+
+def _clean_cell(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    return ' '.join(str(value).split())
+
+
+def detect_header(rows):
+    """Return ``(header_row, layout)`` for the leading ``rows`` of a report.
+
+    ``layout`` is 'cxv', 'adam' or 'generic'; 'cxv' is refined into cxv/wps
+    from the data by ``detect_flavour``.
+    """
+    signatures = {name: {_clean_cell(c) for c in cols} for name, cols in FLAVOUR_SIGNATURES.items()}
+    best = (0, None, 'generic')
+    first_nonempty = None
+    for i, row in enumerate(rows[:HEADER_SCAN_ROWS]):
+        cells = {_clean_cell(c) for c in row} - {''}
+        if cells and first_nonempty is None:
+            first_nonempty = i
+        for name, signature in signatures.items():
+            score = len(cells & signature)
+            if score > best[0]:
+                best = (score, i, name)
+    if best[1] is not None and best[0] >= 2:
+        return best[1], best[2]
+    return first_nonempty or 0, 'generic'
+
+
+def detect_flavour(layout, frame):
+    """Tell CXV and WPS exports apart by the shape of their product descriptions."""
+    if layout != 'cxv' or 'ProductDescription_1' not in frame.columns:
+        return layout
+    products = frame['ProductDescription_1'].dropna().astype(str).str.strip()
+    if products.empty:
+        return 'cxv'
+    return 'cxv' if products.str.contains(_ABILITY_SUFFIX).mean() >= 0.5 else 'wps'
+
+
+def _is_excel(name):
+    return str(name).lower().endswith(('.xlsx', '.xls'))
+
+
+def _peek_csv(source, max_rows=HEADER_SCAN_ROWS):
+    """Read the first rows of a CSV path or binary buffer without consuming it."""
+    if hasattr(source, 'read'):
+        start = source.tell()
+        text = io.TextIOWrapper(source, encoding='utf-8-sig', errors='replace', newline='')
+        try:
+            rows = [row for _, row in zip(range(max_rows), csv.reader(text))]
+        finally:
+            text.detach()
+            source.seek(start)
+        return rows
+    with open(source, encoding='utf-8-sig', errors='replace', newline='') as fh:
+        return [row for _, row in zip(range(max_rows), csv.reader(fh))]
+
+
+def _tabulate(rows, header):
+    """Build a frame from raw row tuples under a cleaned header row."""
+    width = len(header)
+    rows = [(tuple(r) + (None,) * width)[:width] for r in rows]
+    frame = pd.DataFrame(rows, columns=[h or f'Unnamed: {i}' for i, h in enumerate(header)])
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    frame = frame.mask(frame.isna() | frame.map(lambda v: isinstance(v, str) and (v in _NA_STRINGS or not v.strip())))
+    return frame.dropna(how='all')
+
+
+class _GroupedFlattener:
+    """Turns section rows (location / program / pool date / product) into columns.
+
+    Section rows carry a label in the first column only; customer rows leave
+    the first column empty. Each customer inherits the labels above it, which
+    gives the same columns as a flat CXV export. Labels carry over between
+    successive frames so a report can be flattened batch by batch.
+    """
+
+    SECTION_COLUMNS = ('InventoryPoolLocation', 'Textbox20', 'InventoryDate', 'ProductDescription_1')
+
+    def __init__(self, section_column):
+        self.section_column = section_column
+        self.carry = {}
+
+    def section_mask(self, frame):
+        labels = frame[self.section_column]
+        return labels.notna() & frame.drop(columns=[self.section_column]).isna().all(axis=1)
+
+    def __call__(self, frame):
+        labels = frame[self.section_column]
+        others = frame.drop(columns=[self.section_column])
+        is_section = self.section_mask(frame)
+        is_customer = labels.isna() & others.notna().any(axis=1)
+
+        text = labels.where(is_section).astype(object)
+        # A section directly followed by customers is the product line
+        product = is_section & is_customer.shift(-1, fill_value=False)
+        pool_date = is_section & text.astype(str).str.startswith('Inventory Pool Date')
+        location = is_section & text.astype(str).str.contains('Inventory', regex=False) & ~pool_date
+        program = is_section & ~product & ~pool_date & ~location
+
+        out = others.rename(columns={k: v for k, v in ADAM_COLUMNS.items() if k in others.columns})
+        for column, mask in zip(self.SECTION_COLUMNS, (location, program, pool_date, product)):
+            filled = text.where(mask).groupby(mask.cumsum()).transform('first')
+            if column in self.carry:
+                filled = filled.fillna(self.carry[column])
+            if filled.notna().any():
+                self.carry[column] = filled[filled.notna()].iloc[-1]
+            out[column] = filled
+        return out[is_customer]
+
+
+def _iter_xlsx_rows(source):
+    """Stream worksheet rows as value tuples with openpyxl's read-only mode."""
+    from openpyxl import load_workbook
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _iter_excel(source, name, chunk_size):
+    """Yield ``(frame, header_row, layout)`` batches from an Excel report.
+
+    ``.xlsx`` files are streamed row by row (no workbook model is built), so
+    memory is bounded by ``chunk_size``; legacy ``.xls`` files are read whole.
+    """
+    if str(name).lower().endswith('.xls'):
+        raw = pd.read_excel(source, header=None)
+        rows = iter(raw.astype(object).where(raw.notna(), None).itertuples(index=False, name=None))
+    else:
+        rows = _iter_xlsx_rows(source)
+
+    head = list(islice(rows, HEADER_SCAN_ROWS))
+    header_row, layout = detect_header(head)
+    header = [_clean_cell(c) for c in head[header_row]] if head else []
+    flatten = _GroupedFlattener(header[0]) if layout == 'adam' and header else None
+
+    rows = chain(head[header_row + 1:], rows)
+    held = []
+    while True:
+        fresh = list(rows if chunk_size is None else islice(rows, chunk_size))
+        more = chunk_size is not None and len(fresh) == chunk_size
+        batch, held = held + fresh, []
+        if not batch:
+            return
+
+        frame = _tabulate(batch, header)
+        if flatten is not None:
+            # Trailing section rows belong with the customers of the next batch
+            trailing = int(flatten.section_mask(frame).to_numpy()[::-1].cumprod().sum()) if more else 0
+            if trailing:
+                held = [batch[i] for i in frame.index[-trailing:]]
+                frame = frame.iloc[:-trailing]
+            frame = flatten(frame)
+        if len(frame):
+            yield frame.infer_objects().reset_index(drop=True), header_row, layout
+        if not more:
+            return
+
+
+def read_report(source, filename=None):
+    """Read a whole report (path or file-like) into a ``Report``.
+
+    Args:
+        source: Path or binary file-like object (e.g. a Werkzeug FileStorage)
+        filename (str): Name used to pick CSV vs Excel when ``source`` is a buffer
+    """
+    name = filename or getattr(source, 'filename', None) or str(source)
+    if _is_excel(name):
+        header_row, layout, frames = 0, 'generic', []
+        for frame, header_row, layout in _iter_excel(source, name, None):
+            frames.append(frame)
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    else:
+        if hasattr(source, 'stream'):
+            source = source.stream
+        header_row, layout = detect_header(_peek_csv(source))
+        frame = pd.read_csv(source, skiprows=header_row, **_CSV_OPTIONS)
+        frame.columns = [_clean_cell(c) for c in frame.columns]
+    return Report(frame=frame, flavour=detect_flavour(layout, frame), header_row=header_row)
+
+
+def iter_report(source, chunk_size, filename=None):
+    """Yield a report as frames of at most ``chunk_size`` rows.
+
+    CSV files are streamed after the header row and ``.xlsx`` workbooks are
+    streamed in read-only mode; legacy ``.xls`` files are loaded whole but
+    still yielded in chunks.
+    """
+    name = filename or getattr(source, 'filename', None) or str(source)
+    if _is_excel(name):
+        for frame, _, _ in _iter_excel(source, name, chunk_size):
+            yield frame
+        return
+    if hasattr(source, 'stream'):
+        source = source.stream
+    header_row, _ = detect_header(_peek_csv(source))
+    for chunk in pd.read_csv(source, skiprows=header_row, chunksize=chunk_size, **_CSV_OPTIONS):
+        chunk.columns = [_clean_cell(c) for c in chunk.columns]
+        yield chunk
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+"""
+Import Benchmark
+
+Generates synthetic booking reports with the exact CXV/WPS column layout and
+times SnowsportsManager.process_file end-to-end against a fresh SQLite
+database, reporting rows/sec, peak RSS and SQL statement count.
+
+Usage examples (from project root):
+  # 1) Default run: CXV and WPS reports at 1k, 10k and 100k rows
+  #   python scripts/benchmark_import.py
+
+  # 2) Only small WPS reports, 'update' strategy, timing a second upload too
+  #   python scripts/benchmark_import.py --flavour wps --sizes 1000 10000 --strategy update --reimport
+
+  # 3) Just write a report to disk (e.g. to upload by hand)
+  #   python scripts/benchmark_import.py generate --rows 50000 --flavour cxv --out big.csv
+
+Each case runs in its own process so peak RSS is per import, not cumulative.
+"""
+from __future__ import annotations
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import resource
+import tempfile
+from uuid import uuid4
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+REPORT_COLUMNS = [
+    'AuthorizationDescription', 'InventoryPoolLocation', 'Textbox20', 'InventoryDate',
+    'ProductDescription_1', 'CustomerID', 'CustomerName', 'Textbox71', 'Textbox37', 'BirthDate',
+    'ParentID', 'ParentName', 'OrderID', 'ReservationStatus', 'ROLInd', 'PrimaryEmergencyContact',
+    'PrimaryEmergencyPhone', 'FoodAllergy', 'DrugAllergy', 'Medication', 'SpecialCondition',
+]
+
+# Program and product naming per flavour, matching the sample exports
+FLAVOURS = {
+    'cxv': {
+        'program': 'Ride Tribe Late - Cardrona Ski',
+        'products': ['Ride Tribe Late - Cardrona Ski - ' + code
+                     for code in ('FT', 'BZ1', 'BZ2', 'NZ', 'IZ1', 'IZ2', 'AZ')],
+    },
+    'wps': {
+        'program': 'Wanaka Primary Cardrona - Ski',
+        'products': [f'Wanaka Primary - {level} - Cardrona'
+                     for level in ('First Time Ski', 'Beginner Zone Ski', 'Novice Zone Ski',
+                                   'Intermediate Zone 1 Ski', 'Intermediate Zone 2 Ski', 'Advanced Zone Ski')],
+    },
+}
+PRODUCT_WEIGHTS = [3, 4, 6, 6, 5, 4, 2]
+
+FIRST_NAMES = ['Oliver', 'Charlie', 'Ana', 'Elio', 'Nathan', 'Mia', 'Isla', 'Harper', 'Leo', 'Noah',
+               'Ruby', 'George', 'Zoe', 'Finn', 'Lucy', 'Hugo', 'Ella', 'Max', 'Ivy', 'Jack']
+LAST_NAMES = ['Charlton', 'Shaw', 'Baker', 'Park', 'Dallimore', 'Smith', 'Brown', 'Wilson', 'Taylor',
+              'Thompson', 'Walker', 'White', 'Harris', 'Martin', 'Young', 'King', 'Wright', 'Scott']
+ALLERGIES = ['Anaphylaxis to peanuts', 'Dairy', 'Gluten', 'Eggs']
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def _family(rng: random.Random, next_id: int) -> dict:
+    last = rng.choice(LAST_NAMES)
+    parent = f"{rng.choice(FIRST_NAMES)} {last}"
+    return {
+        'last': last,
+        'parent_id': str(next_id),
+        'parent_name': f"{last}, {parent.split()[0]}",
+        'contact': parent,
+        'email': f"{parent.replace(' ', '.').lower()}{next_id % 997}@example.com",
+        'phone': f"02{rng.randrange(10**7, 10**8)}",
+    }
+
+
+def generate_report(path: str, rows: int, flavour: str = 'cxv', seed: int = 42,
+                    duplicate_rate: float = 0.08) -> str:
+    """Write a synthetic ``rows``-row report in the CXV/WPS export layout.
+
+    Families of 1-3 siblings share a parent, order and email. About
+    ``duplicate_rate`` of rows re-book an earlier child under another product
+    (same CustomerID, name and birthdate), like multi-session bookings.
+    Sentinels ('HOH'/'Guest'), blank emails and upper-case names appear at
+    roughly the rates seen in real exports. Note that the importer's email
+    match treats siblings sharing a parent email as one student, so the
+    'skip' strategy skips well over ``duplicate_rate`` of rows.
+    """
+    rng = random.Random(seed)
+    spec = FLAVOURS[flavour]
+    today = date.today()
+    pool_date = f"Inventory Pool Date: {today:%d/%m/%Y}"
+    next_id = 1_000_000
+    order_id = 20_000_000
+    seen = []
+
+    with open(path, 'w', newline='', encoding='utf-8-sig') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(REPORT_COLUMNS)
+        written = 0
+        while written < rows:
+            if seen and rng.random() < duplicate_rate:
+                row = list(rng.choice(seen))
+                row[4] = rng.choice(spec['products'])
+                writer.writerow(row)
+                written += 1
+                continue
+
+            family = _family(rng, next_id)
+            next_id += 1
+            order_id += 1
+            for _ in range(min(rng.choice([1, 1, 2, 2, 3]), rows - written)):
+                first = rng.choice(FIRST_NAMES)
+                name = f"{family['last']}, {first}"
+                if rng.random() < 0.05:
+                    name = name.upper()
+                birth = today - timedelta(days=rng.randrange(4 * 365, 15 * 365))
+                email = '' if rng.random() < 0.05 else family['email']
+                row = [
+                    ' Valid (Y/N)', 'Cardrona-Treble Cone SSS Inventory', spec['program'], pool_date,
+                    rng.choices(spec['products'], weights=PRODUCT_WEIGHTS[:len(spec['products'])])[0],
+                    str(next_id), name, 'HOH' if rng.random() < 0.8 else 'Guest', email,
+                    birth.strftime('%d-%b-%y'),
+                    family['parent_id'] if rng.random() < 0.9 else '',
+                    family['parent_name'], str(order_id), 'Sale' if rng.random() < 0.9 else 'Open', 'N',
+                    family['contact'], family['phone'],
+                    rng.choice(ALLERGIES) if rng.random() < 0.05 else '', '', '', '',
+                ]
+                next_id += 1
+                writer.writerow(row)
+                written += 1
+                if len(seen) < 10_000:
+                    seen.append(row)
+    return path
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(path: str, strategy: str, reimport: bool, db_path: str) -> dict:
+    """Import ``path`` into a fresh SQLite database and return timings (runs in a worker process)."""
+    from sqlalchemy import event
+    from config import config, TestingConfig
+
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        SQLALCHEMY_RECORD_QUERIES = False
+        IMPORT_ASYNC = False
+
+    config['benchmark'] = BenchmarkConfig
+
+    from app import create_app
+    from app.extensions import db
+    from app.models import Program, Student
+    from app.snowsports_manager import SnowsportsManager
+
+    app = create_app('benchmark')
+    result = {}
+    with app.app_context():
+        db.create_all()
+        program = Program(id=str(uuid4()), name='Benchmark', active=True)
+        db.session.add(program)
+        db.session.commit()
+
+        statements = {'count': 0}
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements['count'] += 1
+
+        manager = SnowsportsManager()
+        passes = ['first', 'reimport'] if reimport else ['first']
+        for label in passes:
+            statements['count'] = 0
+            start = time.perf_counter()
+            success, message = manager.process_file(path, program.id, duplicate_strategy=strategy, use_cache=False)
+            elapsed = time.perf_counter() - start
+            result[label] = {
+                'success': success,
+                'message': message,
+                'seconds': elapsed,
+                'queries': statements['count'],
+            }
+        result['students'] = Student.query.filter_by(program_id=program.id).count()
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def benchmark(sizes: list[int], flavours: list[str], strategy: str, reimport: bool, seed: int,
+              duplicate_rate: float, keep: str | None) -> int:
+    workdir = keep or tempfile.mkdtemp(prefix='import-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    ctx = multiprocessing.get_context('spawn')
+
+    header = f"{'flavour':<7} {'rows':>8} {'pass':<9} {'seconds':>8} {'rows/s':>9} {'queries':>8} {'rss MB':>7}  result"
+    print(header)
+    print('-' * len(header))
+    failures = 0
+    for flavour in flavours:
+        for rows in sizes:
+            report = generate_report(os.path.join(workdir, f"{flavour}_{rows}.csv"), rows, flavour,
+                                     seed=seed, duplicate_rate=duplicate_rate)
+            db_path = os.path.join(workdir, f"{flavour}_{rows}.db")
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                result = pool.submit(run_case, report, strategy, reimport, db_path).result()
+            for label in ('first', 'reimport'):
+                if label not in result:
+                    continue
+                r = result[label]
+                failures += not r['success']
+                rate = rows / r['seconds'] if r['seconds'] else 0.0
+                print(f"{flavour:<7} {rows:>8} {label:<9} {r['seconds']:>8.2f} {rate:>9.0f} "
+                      f"{r['queries']:>8} {result['peak_rss_mb']:>7.0f}  {r['message']}")
+            if not keep:
+                os.remove(report)
+                os.remove(db_path)
+    if not keep:
+        os.rmdir(workdir)
+    else:
+        print(f"\nReports and databases kept in {workdir}")
+    return 1 if failures else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark student imports on synthetic reports.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Report sizes in rows")
+    parser.add_argument("--flavour", choices=["cxv", "wps", "both"], default="both", help="Report flavour")
+    parser.add_argument("--strategy", choices=["skip", "update", "duplicate", "sync"], default="skip",
+                        help="Duplicate strategy passed to process_file")
+    parser.add_argument("--reimport", action="store_true", help="Also time a second upload of the same file")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for report generation")
+    parser.add_argument("--duplicate-rate", type=float, default=0.08, help="Share of rows re-booking a child")
+    parser.add_argument("--keep", metavar="DIR", help="Keep generated reports and databases in DIR")
+    sub = parser.add_subparsers(dest="action")
+
+    p_gen = sub.add_parser("generate", help="Write a synthetic report and exit")
+    p_gen.add_argument("--rows", type=int, required=True, help="Number of rows")
+    p_gen.add_argument("--flavour", dest="gen_flavour", choices=["cxv", "wps"], default="cxv", help="Report flavour")
+    p_gen.add_argument("--out", required=True, help="Output CSV path")
+
+    args = parser.parse_args(argv)
+
+    if args.action == "generate":
+        generate_report(args.out, args.rows, args.gen_flavour, seed=args.seed, duplicate_rate=args.duplicate_rate)
+        print(f"Wrote {args.rows} rows to {args.out}")
+        return 0
+
+    flavours = ["cxv", "wps"] if args.flavour == "both" else [args.flavour]
+    return benchmark(args.sizes, flavours, args.strategy, args.reimport, args.seed, args.duplicate_rate, args.keep)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from report_reader import read_report
+
 def read_excel_simple(file_path):
     try:
         # Read the Excel file
@@ -7,20 +9,10 @@ def read_excel_simple(file_path):
         print(f"File: {file_path}")
         print(f"Sheets: {xls.sheet_names}")
         
-        # Read the first sheet
-        df = pd.read_excel(file_path, sheet_name=0, header=None)
-        
-        # Find the first row with data
-        first_data_row = 0
-        for i in range(min(20, len(df))):  # Check first 20 rows
-            if not df.iloc[i].isna().all():
-                first_data_row = i
-                break
-                
-        print(f"\nFirst data row: {first_data_row}")
-        
-        # Read the file again with the correct header
-        df = pd.read_excel(file_path, sheet_name=0, header=first_data_row)
+        # Read the first sheet once, detecting the header row
+        report = read_report(file_path)
+        df = report.frame
+        print(f"\nHeader row: {report.header_row} ({report.flavour} report)")
         
         # Print column names and first few rows
         print("\nColumns:")
@@ -2,6 +2,8 @@ import pandas as pd
 from datetime import datetime
 import os
 
+from abilities import ABILITY_LABELS, normalize_series
+
 class SnowsportsManager:
     def __init__(self, csv_file):
         self.csv_file = csv_file
@@ -25,7 +27,7 @@ class SnowsportsManager:
             df['Age'] = (program_start - df['BirthDate']).dt.days // 365
             
             # Extract ability level from ProductDescription_1 if available
-            df['AbilityLevel'] = df['ProductDescription_1'].str.extract(r'(?i)(beginner|intermediate|advanced)')
+            df['AbilityLevel'] = normalize_series(df['ProductDescription_1']).map(ABILITY_LABELS)
             
             # Store the cleaned data
             self.students = df.to_dict('records')
@@ -2,6 +2,8 @@ import pandas as pd
 from datetime import datetime
 import os
 
+from abilities import ABILITY_LABELS, normalize_series
+
 class SnowsportsManager:
     def __init__(self, csv_file):
         self.csv_file = csv_file
@@ -24,16 +26,8 @@ class SnowsportsManager:
             program_start = datetime(2025, 9, 1)
             df['Age'] = (program_start - df['BirthDate']).dt.days // 365
             
-            # Extract ability level from ProductDescription_1 (FT = First Timer, BZ = Bronze, etc.)
-            df['AbilityLevel'] = df['ProductDescription_1'].str.extract(r'-(\w+)$')
-            ability_map = {
-                'FT': 'Beginner',
-                'BZ': 'Bronze',
-                'SL': 'Silver',
-                'GLD': 'Gold',
-                'PLT': 'Platinum'
-            }
-            df['AbilityLevel'] = df['AbilityLevel'].map(ability_map).fillna('Beginner')
+            # Ability level from ProductDescription_1 ("... - FT", "... - First Time Ski - ...")
+            df['AbilityLevel'] = normalize_series(df['ProductDescription_1']).map(ABILITY_LABELS).fillna('Beginner')
             
             # Store the cleaned data
             self.students = df.to_dict('records')
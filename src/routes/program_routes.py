@@ -7,6 +7,7 @@ import io
 
 from src.models.models import db, Student, Group, Membership, Movement, Progress
 from src.services.grouping import build_stage1, build_stage2, pack_excel
+from report_reader import read_report
 
 program_bp = Blueprint('program', __name__)
 
@@ -35,15 +36,14 @@ def upload():
     
     if file and file.filename.endswith(('.csv', '.xlsx')):
         try:
-            # Read the uploaded file
-            if file.filename.endswith('.csv'):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
+            # Read the uploaded file (header row and report flavour are detected)
+            df = read_report(file, filename=file.filename).frame
             
             # Process stage 1 grouping
             group_size = int(request.form.get('group_size', 6))
-            summary_df, instructor_assign_df, profiles_df, stage1_groups_df, program_start_date = build_stage1(df, group_size)
+            algorithm = request.form.get('algorithm', 'chunk')
+            summary_df, instructor_assign_df, profiles_df, stage1_groups_df, program_start_date = build_stage1(
+                df, group_size, algorithm=algorithm)
             
             # Save to database (in a real app, you'd use a transaction)
             db.session.begin()
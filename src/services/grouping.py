@@ -4,6 +4,9 @@ import io
 import xlsxwriter
 from typing import Tuple, Dict, Any
 
+from abilities import normalize_ability
+from grouping_engine import assign_groups
+
 def parse_inventory_date(date_str: str) -> datetime:
     """Parse inventory date from string like 'Inventory Pool Date: dd/mm/yyyy'"""
     try:
@@ -12,27 +15,37 @@ def parse_inventory_date(date_str: str) -> datetime:
     except (ValueError, AttributeError, IndexError):
         return datetime.utcnow()
 
-def parse_birthdate(date_str: str) -> datetime:
-    """Parse birthdate from string like 'dd-mmm-yy'"""
-    try:
-        return datetime.strptime(date_str, '%d-%b-%y')
-    except (ValueError, TypeError):
-        return None
-
 def extract_ability(description: str) -> str:
     """Extract ability code from product description"""
+    code = normalize_ability(description)
+    if code:
+        return code
     if not description or not isinstance(description, str):
         return "UNKNOWN"
-    # Get the last token as ability code
+    # Unrecognized products: the last token stands in for the code
     return description.strip().split()[-1] if description.strip() else "UNKNOWN"
 
-def build_stage1(df: pd.DataFrame, group_size: int = 6) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, datetime]:
+def _map_distinct(values: pd.Series, convert) -> pd.Series:
+    """Run a vectorized ``convert`` over the distinct values only and broadcast back.
+
+    Reports repeat a few dozen products and a few thousand birthdates, so
+    converting each distinct value once is much cheaper than every row.
+    """
+    codes, uniques = pd.factorize(values)
+    # Missing values get code -1, which picks the trailing None's conversion
+    converted = convert(pd.Series(list(uniques) + [None], dtype=object))
+    return pd.Series(converted.to_numpy()[codes], index=values.index)
+
+def build_stage1(df: pd.DataFrame, group_size: int = 6, algorithm: str = 'chunk',
+                 time_budget: float = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, datetime]:
     """
     Process the input DataFrame and generate stage 1 grouping.
     
     Args:
         df: Input DataFrame with student data
         group_size: Maximum number of students per group
+        algorithm: Grouping engine algorithm ('chunk' slices the age-sorted list)
+        time_budget: Seconds per ability for the 'optimize' algorithm
         
     Returns:
         Tuple containing:
@@ -50,30 +63,29 @@ def build_stage1(df: pd.DataFrame, group_size: int = 6) -> Tuple[pd.DataFrame, p
         program_start_date = datetime.utcnow()
     
     # Clean and prepare data
-    df['Ability'] = df['ProductDescription_1'].apply(extract_ability)
+    df['Ability'] = _map_distinct(df['ProductDescription_1'], lambda values: values.map(extract_ability))
     
     if 'BirthDate' in df.columns:
-        df['BirthDate'] = df['BirthDate'].apply(parse_birthdate)
-        df['Age'] = df['BirthDate'].apply(
-            lambda x: (program_start_date - x).days / 365.25 if pd.notnull(x) else 0
+        df['BirthDate'] = _map_distinct(
+            df['BirthDate'], lambda values: pd.to_datetime(values, format='%d-%b-%y', errors='coerce')
         )
+        df['Age'] = ((pd.Timestamp(program_start_date) - df['BirthDate']).dt.days / 365.25).fillna(0)
     
     # Sort by ability, age, and name
     df_sorted = df.sort_values(by=['Ability', 'Age', 'CustomerName'])
     
-    # Assign groups
-    df_sorted['ProposedGroupID'] = ''
-    current_group = 1
-    
-    for ability in df_sorted['Ability'].unique():
-        ability_df = df_sorted[df_sorted['Ability'] == ability]
-        num_groups = (len(ability_df) + group_size - 1) // group_size
-        
-        for i in range(num_groups):
-            start_idx = i * group_size
-            end_idx = min((i + 1) * group_size, len(ability_df))
-            group_id = f"{ability}-{i+1}"
-            df_sorted.loc[ability_df.iloc[start_idx:end_idx].index, 'ProposedGroupID'] = group_id
+    # Assign groups: consecutive slices of each ability's age-sorted students,
+    # or the grouping engine's placement per ability
+    by_ability = df_sorted.groupby('Ability', sort=False)
+    if algorithm == 'chunk':
+        slots = by_ability.cumcount() // group_size
+    else:
+        slots = pd.Series(0, index=df_sorted.index)
+        ages = df_sorted['Age'].to_numpy(dtype=float)
+        for positions in by_ability.indices.values():
+            num_groups = (len(positions) + group_size - 1) // group_size
+            slots.iloc[positions] = assign_groups(ages[positions], [group_size] * num_groups, algorithm, time_budget)
+    df_sorted['ProposedGroupID'] = df_sorted['Ability'] + '-' + (slots + 1).astype(str)
     
     # Create summary DataFrame
     summary_df = df_sorted.groupby('ProposedGroupID').agg(
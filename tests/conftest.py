@@ -0,0 +1,39 @@
+"""Shared fixtures: an app on the in-memory 'testing' database with the schema created."""
+from uuid import uuid4
+
+import pytest
+
+from app import create_app, db
+from app.models import Program
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Test client logged in as an admin."""
+    from app.models import User
+    user = User(username='admin', email='admin@example.com', is_admin=True)
+    user.set_password('admin')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
+
+
+def new_program(name='Test'):
+    program = Program(id=str(uuid4()), name=name, active=True)
+    db.session.add(program)
+    db.session.commit()
+    return program.id
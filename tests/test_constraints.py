@@ -0,0 +1,101 @@
+"""Grouping constraints: together / apart / pin rules in the engine and from the database."""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app import db
+from app.models import Student
+from app.snowsports_manager import SnowsportsManager, load_constraints
+from grouping_engine import ALGORITHMS, Constraints, assign_constrained, assign_groups
+
+from conftest import new_program
+
+
+def ages(n):
+    return np.linspace(15, 5, n)
+
+
+def units(constraints, n, max_capacity=8):
+    found, demoted = constraints.units(n, max_capacity)
+    return sorted(sorted(int(i) for i in u) for u in found), demoted
+
+
+def test_hard_together_pairs_merge_into_units():
+    found, demoted = units(Constraints(together=[(0, 1, True), (1, 2, True), (3, 4, False)]), 5)
+    assert found == [[0, 1, 2], [3], [4]] and demoted == []
+
+
+def test_units_that_cannot_hold_fall_back_to_soft_pairs():
+    # Larger than the biggest group
+    found, demoted = units(Constraints(together=[(0, 1, True), (1, 2, True)]), 3, max_capacity=2)
+    assert found == [[0], [1], [2]] and sorted(demoted) == [(0, 1), (1, 2)]
+    # Holding a hard apart pair
+    found, demoted = units(Constraints(together=[(0, 1, True), (1, 2, True)], apart=[(0, 2, True)]), 3)
+    assert found == [[0], [1], [2]] and len(demoted) == 2
+
+
+def test_empty_constraints_are_falsy():
+    assert not Constraints()
+    assert not Constraints(together=[(1, 1, True)])
+    assert Constraints(pins={0: 1})
+
+
+@pytest.mark.parametrize('algorithm', sorted(ALGORITHMS))
+def test_hard_rules_and_pins_hold(algorithm):
+    constraints = Constraints(together=[(0, 19, True), (5, 12, True)], apart=[(1, 2, True), (3, 4, True)],
+                              pins={7: 2, 8: 0})
+    slots = assign_constrained(ages(20), [8, 8, 8], constraints, algorithm, time_budget=0.05)
+    assert slots[0] == slots[19] and slots[5] == slots[12]
+    assert slots[1] != slots[2] and slots[3] != slots[4]
+    assert slots[7] == 2 and slots[8] == 0
+    assert (slots >= 0).all()
+    assert (np.bincount(slots, minlength=3) <= 8).all()
+
+
+@pytest.mark.parametrize('algorithm', sorted(ALGORITHMS))
+def test_soft_rules_are_kept_when_they_cost_little(algorithm):
+    # Neighbours in age at the boundary between the two age bands
+    constraints = Constraints(together=[(7, 8, False)], apart=[(8, 9, False)])
+    slots = assign_constrained(ages(16), [8, 8], constraints, algorithm, time_budget=0.05)
+    assert slots[7] == slots[8] and slots[8] != slots[9]
+
+
+def test_hard_apart_without_a_free_group_leaves_the_student_unplaced():
+    slots = assign_constrained(ages(3), [8], Constraints(apart=[(0, 1, True)]))
+    assert sorted(slots) == [-1, 0, 0]
+
+
+def test_pins_may_overfill_their_group():
+    slots = assign_constrained(ages(3), [2, 2], Constraints(pins={0: 0, 1: 0, 2: 0}))
+    assert list(slots) == [0, 0, 0]
+
+
+def test_without_constraints_the_algorithm_layout_is_unchanged():
+    for algorithm in ('snake', 'chunk'):
+        expected = assign_groups(ages(17), [8, 8, 8], algorithm)
+        assert (assign_constrained(ages(17), [8, 8, 8], Constraints(), algorithm) == expected).all()
+
+
+def test_load_constraints_adds_family_defaults(app):
+    program_id = new_program()
+    family = [('a', 'P1'), ('b', 'P1'), ('c', None)] + [(f'class{i}', 'SCHOOL') for i in range(5)]
+    for student_id, parent_id in family:
+        db.session.add(Student(id=student_id, name=student_id, program_id=program_id, ability_level='FT',
+                               birth_date=date(2014, 1, 1), parent_id=parent_id))
+    db.session.commit()
+    students = Student.query.filter_by(program_id=program_id).all()
+
+    # Sets larger than FAMILY_GROUP_LIMIT are bulk bookings, not families
+    assert load_constraints(db.session, program_id, students)['together'] == [('a', 'b', False)]
+    assert load_constraints(db.session, program_id, students, 'hard')['together'] == [('a', 'b', True)]
+    assert load_constraints(db.session, program_id, students, 'off')['together'] == []
+
+    # An explicit rule replaces the family default; pins are by group name
+    manager = SnowsportsManager()
+    manager.add_constraint(program_id, 'apart', ['a', 'b'], hard=True)
+    manager.add_constraint(program_id, 'pin', ['c'], group_name='FT Group 2')
+    rules = load_constraints(db.session, program_id, students)
+    assert rules == {'together': [], 'apart': [('a', 'b', True)], 'pins': {'c': 'FT Group 2'}}
+    with pytest.raises(ValueError):
+        load_constraints(db.session, program_id, students, 'strict')
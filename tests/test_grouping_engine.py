@@ -0,0 +1,84 @@
+"""Grouping engine: capacities, balance, optimize quality, time budget and determinism."""
+import time
+
+import numpy as np
+import pytest
+
+from grouping_engine import (
+    ALGORITHMS, assign_chunk, assign_groups, assign_optimize, assign_snake, balanced_sizes, cost,
+)
+
+
+def bucket(n, seed=0, missing=0):
+    """Ages of ``n`` students between 5 and 15, oldest first, ``missing`` of them unknown."""
+    rng = np.random.default_rng(seed)
+    ages = np.sort(rng.uniform(5, 15, n))[::-1].copy()
+    ages[rng.choice(n, missing, replace=False)] = np.nan
+    return ages
+
+
+@pytest.mark.parametrize('n, capacities, expected', [
+    (17, [8, 8, 8], [6, 6, 5]),
+    (16, [8, 8], [8, 8]),
+    (10, [3, 8, 8], [3, 4, 3]),
+    (30, [8, 8, 8], [8, 8, 8]),
+    (0, [8, 8], [0, 0]),
+    (5, [0, 8], [0, 5]),
+])
+def test_balanced_sizes(n, capacities, expected):
+    assert list(balanced_sizes(n, capacities)) == expected
+
+
+@pytest.mark.parametrize('algorithm', sorted(ALGORITHMS))
+@pytest.mark.parametrize('n, capacities', [(17, [8, 8, 8]), (23, [6, 8, 10]), (20, [8, 8]), (7, [3, 0, 8])])
+def test_capacities_are_respected(algorithm, n, capacities):
+    slots = assign_groups(bucket(n, n), capacities, algorithm, time_budget=0.05)
+    sizes = np.bincount(slots[slots >= 0], minlength=len(capacities))
+    assert (sizes <= capacities).all()
+    # Everyone who fits is placed; the rest are -1
+    assert (slots >= 0).sum() == min(n, sum(capacities))
+    assert ((slots >= -1) & (slots < len(capacities))).all()
+
+
+@pytest.mark.parametrize('assign', [assign_snake, assign_optimize])
+def test_sizes_are_balanced(assign):
+    slots = assign(bucket(17), [8, 8, 8])
+    assert sorted(np.bincount(slots)) == [5, 6, 6]
+
+
+def test_chunk_fills_groups_in_order():
+    assert list(assign_chunk(bucket(10), [4, 4, 4])) == [0, 0, 0, 0, 1, 1, 1, 1, 2, 2]
+
+
+def test_no_groups_places_nobody():
+    for algorithm in ALGORITHMS:
+        assert list(assign_groups(bucket(4), [], algorithm)) == [-1] * 4
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_optimize_never_costs_more_than_snake(seed):
+    n = 12 + 7 * seed
+    ages = bucket(n, seed, missing=seed % 3)
+    capacities = [8] * -(-n // 8)
+    snake = assign_snake(ages, capacities)
+    optimized = assign_optimize(ages, capacities, time_budget=1.0)
+    assert cost(ages, optimized, len(capacities)) <= cost(ages, snake, len(capacities))
+
+
+def test_time_budget_bounds_the_search():
+    ages = bucket(400, 1)
+    capacities = [8] * 50
+    started = time.perf_counter()
+    assign_optimize(ages, capacities, time_budget=0.05)
+    assert time.perf_counter() - started < 0.5
+
+    # No budget: the balanced, age-sorted start as is
+    slots = assign_optimize(ages, capacities, time_budget=0)
+    assert sorted(np.bincount(slots)) == list(balanced_sizes(400, capacities))
+
+
+@pytest.mark.parametrize('algorithm', sorted(ALGORITHMS))
+def test_output_is_deterministic(algorithm):
+    ages = bucket(40, 3, missing=2)
+    runs = [assign_groups(ages, [8] * 5, algorithm, time_budget=2.0) for _ in range(3)]
+    assert all((run == runs[0]).all() for run in runs)
@@ -0,0 +1,138 @@
+"""Incremental placement: new students join existing groups without moving anyone."""
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import Group, Membership, Student
+from app.snowsports_manager import SnowsportsManager, place_constrained
+from grouping_engine import place_students
+
+from conftest import new_program
+
+NAN = float('nan')
+
+
+class Row:
+    def __init__(self, id, birth_date=None, group_id=None, name=None, max_size=8):
+        self.id, self.birth_date, self.group_id, self.name, self.max_size = id, birth_date, group_id, name, max_size
+
+
+def rules(together=(), apart=(), pins=None):
+    return {'together': list(together), 'apart': list(apart), 'pins': dict(pins or {})}
+
+
+def test_place_students_joins_the_nearest_age_band():
+    # Groups of 6-7 and 11-12 year olds; a 12 year old joins the older group
+    slots = place_students([12.0, 6.5], [6.0, 11.0], [7.0, 12.0], [4, 4], [8, 8])
+    assert list(slots) == [1, 0]
+
+
+def test_place_students_respects_capacity():
+    slots = place_students([12.0, 12.0, 12.0], [6.0, 11.0], [7.0, 12.0], [4, 7], [8, 8])
+    assert list(slots) == [1, 0, 0]
+    assert list(place_students([9.0], [6.0], [7.0], [8], [8])) == [-1]
+
+
+def test_place_students_fills_empty_groups_and_unknown_ages():
+    slots = place_students([NAN, 9.0], [NAN, NAN], [NAN, NAN], [0, 0], [8, 8])
+    assert sorted(slots) == [0, 1]
+    assert list(place_students([9.0], [], [], [], [])) == [-1]
+
+
+def members_and_groups():
+    groups = [Row('g1', name='FT Group 1'), Row('g2', name='FT Group 2')]
+    members = [Row('m1', date(2012, 1, 1), 'g1'), Row('m2', date(2012, 6, 1), 'g1'),
+               Row('m3', date(2018, 1, 1), 'g2'), Row('m4', date(2018, 6, 1), 'g2')]
+    return members, groups
+
+
+def test_place_constrained_keeps_hard_rules_with_placed_members():
+    members, groups = members_and_groups()
+    new = [Row('n1', date(2012, 3, 1)), Row('n2', date(2012, 3, 1)), Row('n3', date(2012, 3, 1))]
+    placed = place_constrained(new, members, groups, rules(
+        together=[('n1', 'm3', True)], apart=[('n2', 'm1', True)], pins={'n3': 'FT Group 2'}))
+    # Age alone would put all three with the 2012 group
+    assert placed == {'n1': 1, 'n2': 1, 'n3': 1}
+
+
+def test_place_constrained_leaves_students_without_rules_out():
+    members, groups = members_and_groups()
+    new = [Row('n1', date(2012, 3, 1)), Row('n2', date(2018, 3, 1))]
+    assert place_constrained(new, members, groups, rules(together=[('m1', 'm2', True)])) == {}
+    # A pin to another ability's group does not apply here
+    assert place_constrained(new, members, groups, rules(pins={'n1': 'BZ1 Group 1'})) == {}
+
+
+def test_place_constrained_reports_students_hard_rules_exclude():
+    members, groups = members_and_groups()
+    new = [Row('n1', date(2012, 3, 1))]
+    placed = place_constrained(new, members, groups, rules(apart=[('n1', 'm1', True), ('n1', 'm3', True)]))
+    assert placed == {'n1': -1}
+
+
+@pytest.fixture
+def program(app):
+    """A program with week 1 generated for 12 FT students; returns (manager, program_id)."""
+    manager = SnowsportsManager()
+    program_id = new_program()
+    for i in range(12):
+        db.session.add(Student(id=f's{i}', name=f'S{i}', program_id=program_id, ability_level='FT',
+                               birth_date=date(2010 + i % 8, 1, 1)))
+    db.session.commit()
+    manager.create_groups_weekly(program_id, 1, max_group_size=8)
+    return manager, program_id
+
+
+def week_groups(week=1):
+    return dict(db.session.query(Membership.student_id, Membership.group_id)
+                .filter_by(week_number=week, is_active=True).all())
+
+
+def add_student(program_id, student_id, year, ability='FT', parent_id=None):
+    db.session.add(Student(id=student_id, name=student_id, program_id=program_id, ability_level=ability,
+                           birth_date=date(year, 1, 1), parent_id=parent_id))
+    db.session.commit()
+
+
+def test_place_unassigned_weekly_keeps_everyone_in_place(program):
+    manager, program_id = program
+    before = week_groups()
+    add_student(program_id, 'late1', 2012)
+    add_student(program_id, 'late2', 2016)
+    assert manager.place_unassigned_weekly(program_id, 1) == (2, 0)
+    after = week_groups()
+    assert {k: after[k] for k in before} == before
+    assert {'late1', 'late2'} <= set(after)
+    assert manager.place_unassigned_weekly(program_id, 1) == (0, 0)
+
+
+def test_place_unassigned_weekly_reports_students_without_a_group(program):
+    manager, program_id = program
+    add_student(program_id, 'late1', 2012, ability='AZ')
+    assert manager.place_unassigned_weekly(program_id, 1) == (0, 1)
+
+
+def test_place_unassigned_weekly_follows_constraints(program):
+    manager, program_id = program
+    groups = {g.name: g.id for g in Group.query.filter_by(program_id=program_id)}
+    before = week_groups()
+    add_student(program_id, 'pinned', 2011)
+    add_student(program_id, 'buddy', 2017)
+    add_student(program_id, 'sibling', 2012, parent_id='P1')
+    Student.query.filter_by(id='s7').update({'parent_id': 'P1'})
+    db.session.commit()
+    manager.add_constraint(program_id, 'pin', ['pinned'], group_name='FT Group 2')
+    manager.add_constraint(program_id, 'together', ['s0', 'buddy'], hard=True)
+
+    assert manager.place_unassigned_weekly(program_id, 1) == (3, 0)
+    after = week_groups()
+    assert after['pinned'] == groups['FT Group 2']
+    assert after['buddy'] == before['s0']
+    assert after['sibling'] == before['s7']
+
+
+def test_place_unassigned_weekly_needs_a_generated_week(program):
+    manager, program_id = program
+    with pytest.raises(ValueError, match='no groups yet'):
+        manager.place_unassigned_weekly(program_id, 2)
@@ -0,0 +1,84 @@
+"""Student import: results must not depend on how the upload is chunked."""
+import os
+from app import db
+from app.models import Student
+from app.snowsports_manager import SnowsportsManager
+
+from conftest import new_program
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT = os.path.join(ROOT, 'Report CXV.csv')
+
+STUDENT_COLUMNS = ('customer_id', 'name', 'birth_date', 'ability_level', 'parent_name', 'contact_email',
+                   'emergency_contact', 'emergency_phone', 'food_allergy', 'medication', 'special_condition',
+                   'parent_id', 'order_id')
+
+
+def imported_rows(program_id):
+    students = Student.query.filter_by(program_id=program_id).all()
+    return sorted(tuple(getattr(s, c) for c in STUDENT_COLUMNS) for s in students)
+
+
+def import_rows(chunk_size):
+    """Import REPORT into an empty database and return the stored student rows."""
+    db.drop_all()
+    db.create_all()
+    program_id = new_program()
+    assert SnowsportsManager().process_file(REPORT, program_id, chunk_size=chunk_size, use_cache=False)[0]
+    return imported_rows(program_id)
+
+
+def test_chunk_size_does_not_change_imported_rows(app):
+    rows = import_rows(7)
+    assert rows and rows == import_rows(100_000)
+    # Ids stay ids and phones keep their leading zero
+    assert not any(row[0].endswith('.0') for row in rows)
+    assert any(row[7].startswith('0') for row in rows)
+
+
+def test_sync_after_chunked_import_changes_nothing(app):
+    manager = SnowsportsManager()
+    program_id = new_program()
+    assert manager.process_file(REPORT, program_id, duplicate_strategy='sync', chunk_size=7, use_cache=False)[0]
+    count = Student.query.filter_by(program_id=program_id).count()
+
+    success, message = manager.process_file(REPORT, program_id, duplicate_strategy='sync', use_cache=False,
+                                            withdraw_missing=True)
+    assert success, message
+    assert 'inserted 0, updated 0' in message and 'withdrawn 0' in message
+    assert Student.query.filter_by(program_id=program_id).count() == count
+
+
+def multi_product_report(path):
+    """REPORT with a second product row (BZ2) for every third customer, a few rows later."""
+    with open(REPORT, encoding='utf-8-sig') as fh:
+        header, *rows = fh.read().splitlines()
+    extra = [row.replace('Cardrona Ski - FT,', 'Cardrona Ski - BZ2,') for row in rows[::3] if ' - FT,' in row]
+    assert extra
+    lines = [header]
+    for i, row in enumerate(rows):
+        lines.append(row)
+        if i % 5 == 4 and extra:
+            lines.append(extra.pop())
+    lines.extend(extra)
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_resync_with_repeated_customer_rows_changes_nothing(app, tmp_path):
+    report = multi_product_report(tmp_path / 'multi.csv')
+    manager = SnowsportsManager()
+    program_id = new_program()
+    success, message = manager.process_file(report, program_id, duplicate_strategy='sync', chunk_size=7,
+                                            use_cache=False)
+    assert success, message
+    customers = Student.query.filter_by(program_id=program_id).count()
+    assert f'inserted {customers}, updated 0' in message
+    stored = {s.customer_id: s.ability_level for s in Student.query.filter_by(program_id=program_id)}
+
+    for chunk_size in (7, 100_000):
+        success, message = manager.process_file(report, program_id, duplicate_strategy='sync',
+                                                chunk_size=chunk_size, use_cache=False)
+        assert success, message
+        assert f'inserted 0, updated 0, unchanged {customers}' in message
+    assert {s.customer_id: s.ability_level for s in Student.query.filter_by(program_id=program_id)} == stored
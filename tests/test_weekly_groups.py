@@ -0,0 +1,67 @@
+"""Weekly group generation: every student gets a group, and hard rules hold."""
+from datetime import date
+
+from app import db
+from app.models import Membership, Student
+from app.snowsports_manager import SnowsportsManager, plan_weekly_groups
+
+from conftest import new_program
+
+
+class Row:
+    def __init__(self, id, ability_level='FT', birth_date=None):
+        self.id, self.ability_level, self.birth_date = id, ability_level, birth_date
+
+
+def students(n, ability_level='FT'):
+    return [Row(f's{i}', ability_level, date(2012 + i % 6, 1 + i % 12, 1)) for i in range(n)]
+
+
+def rules(together=(), apart=(), pins=None):
+    return {'together': list(together), 'apart': list(apart), 'pins': dict(pins or {})}
+
+
+def group_of(memberships):
+    return {m['student_id']: m['group_id'] for m in memberships}
+
+
+def test_hard_apart_adds_a_group_instead_of_dropping_a_student():
+    roster = students(5)
+    new_groups, memberships = plan_weekly_groups('p', 1, roster, max_group_size=8,
+                                                 constraints=rules(apart=[('s0', 's1', True)]))
+    placed = group_of(memberships)
+    assert len(new_groups) == 2
+    assert len(memberships) == 5
+    assert placed['s0'] != placed['s1']
+
+
+def test_hard_apart_chain_gets_as_many_groups_as_it_needs():
+    roster = students(4)
+    apart = [(a.id, b.id, True) for i, a in enumerate(roster) for b in roster[i + 1:]]
+    new_groups, memberships = plan_weekly_groups('p', 1, roster, max_group_size=8, constraints=rules(apart=apart))
+    assert len(new_groups) == 4
+    assert len(set(group_of(memberships).values())) == 4
+
+
+def test_without_rules_the_head_count_sets_the_group_count():
+    new_groups, memberships = plan_weekly_groups('p', 1, students(17), max_group_size=8, constraints=rules())
+    assert len(new_groups) == 3
+    assert len(memberships) == 17
+
+
+def test_create_groups_weekly_reports_no_unplaced_students(app):
+    manager = SnowsportsManager()
+    program_id = new_program()
+    for row in students(5):
+        db.session.add(Student(id=row.id, name=row.id, program_id=program_id, ability_level='FT',
+                               birth_date=row.birth_date))
+    db.session.commit()
+    manager.add_constraint(program_id, 'apart', ['s0', 's1'], hard=True)
+
+    created, unplaced = manager.create_groups_weekly(program_id, 1, max_group_size=8)
+    assert (created, unplaced) == (2, 0)
+    assert Membership.query.filter_by(week_number=1).count() == 5
+
+    groups, weeks, unplaced = manager.generate_season(program_id, max_group_size=8)
+    assert (groups, unplaced) == (2, 0)
+    assert Membership.query.filter_by(week_number=weeks).count() == 5